@@ -0,0 +1,141 @@
+"""Compare caption discovery via one player request with yt-dlp extract_info.
+
+Fixture mode (default) replays the recorded payloads in fixtures/captions:
+the player path parses the InnerTube response and picks a track, the yt-dlp
+path runs YoutubeDL.process_ie_result on the raw extractor result (format
+sorting, subtitle processing) and picks a track. Network time is excluded,
+so this is the local CPU cost each path adds per summary.
+
+    python benchmarks/bench_caption_discovery.py
+    python benchmarks/bench_caption_discovery.py --live GisSNuVpbkM B6kg2zeJ9do
+    python benchmarks/bench_caption_discovery.py --record GisSNuVpbkM
+
+--live times both real paths end to end (wall and CPU); --record refreshes
+the fixtures from YouTube (uses the DECODO_* proxy settings if present).
+"""
+import os
+import sys
+import copy
+import glob
+import json
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import yt_dlp
+from captions import fetch_player_response, select_caption_url, select_subtitle_url, discover_caption_url
+
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures', 'captions')
+
+YDL_OPTS = {
+    'skip_download': True,
+    'writesubtitles': True,
+    'writeautomaticsub': True,
+    'subtitleslangs': ['en'],
+    'quiet': True,
+    'no_warnings': True,
+}
+
+
+def proxy_from_env():
+    user = os.environ.get('DECODO_USERNAME')
+    password = os.environ.get('DECODO_PASSWORD')
+    if not (user and password):
+        return None
+    host = os.environ.get('DECODO_HOST', 'us.decodo.com')
+    port = os.environ.get('DECODO_PORT', '10001')
+    return f"http://{user}:{password}@{host}:{port}"
+
+
+def timed(fn, repeat):
+    """Return (median wall ms, median CPU ms, last result) over ``repeat`` runs."""
+    walls, cpus, result = [], [], None
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = fn()
+        walls.append((time.perf_counter() - wall) * 1000)
+        cpus.append((time.process_time() - cpu) * 1000)
+    return statistics.median(walls), statistics.median(cpus), result
+
+
+def bench_fixtures(repeat):
+    paths = sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.player.json')))
+    if not paths:
+        sys.exit(f"No fixtures in {FIXTURE_DIR}")
+
+    print(f"{'video':<14}{'path':<10}{'bytes':>10}{'wall ms':>10}{'cpu ms':>10}  track")
+    for player_path in paths:
+        video_id = os.path.basename(player_path).split('.')[0]
+        with open(player_path, 'rb') as f:
+            player_bytes = f.read()
+        with open(os.path.join(FIXTURE_DIR, f"{video_id}.ytdlp.json"), 'rb') as f:
+            ytdlp_bytes = f.read()
+
+        def player_path_run():
+            return select_caption_url(json.loads(player_bytes))
+
+        ydl = yt_dlp.YoutubeDL(YDL_OPTS)
+
+        def ytdlp_path_run():
+            raw = json.loads(ytdlp_bytes)
+            info = ydl.process_ie_result(copy.deepcopy(raw), download=False)
+            return select_subtitle_url(info)
+
+        for name, size, fn in (('player', len(player_bytes), player_path_run),
+                               ('yt-dlp', len(ytdlp_bytes), ytdlp_path_run)):
+            wall, cpu, (url, kind) = timed(fn, repeat)
+            print(f"{video_id:<14}{name:<10}{size:>10}{wall:>10.2f}{cpu:>10.2f}  {kind}")
+
+
+def bench_live(video_ids, repeat):
+    proxy = proxy_from_env()
+    opts = dict(YDL_OPTS, extractor_args={'youtube': {'skip': ['dash', 'hls', 'translated_subs']}})
+    if proxy:
+        opts['proxy'] = proxy
+
+    def ytdlp_live(video_id):
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+        return select_subtitle_url(info)[0]
+
+    print(f"{'video':<14}{'path':<10}{'wall ms':>10}{'cpu ms':>10}  found")
+    for video_id in video_ids:
+        for name, fn in (('player', lambda: discover_caption_url(video_id, proxy=proxy)),
+                         ('yt-dlp', lambda: ytdlp_live(video_id))):
+            wall, cpu, url = timed(fn, repeat)
+            print(f"{video_id:<14}{name:<10}{wall:>10.1f}{cpu:>10.1f}  {bool(url)}")
+
+
+def record(video_ids):
+    proxy = proxy_from_env()
+    opts = dict(YDL_OPTS, proxy=proxy) if proxy else YDL_OPTS
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+
+    for video_id in video_ids:
+        player = fetch_player_response(video_id, proxy=proxy)
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            raw = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False, process=False)
+
+        with open(os.path.join(FIXTURE_DIR, f"{video_id}.player.json"), 'w') as f:
+            json.dump(player, f, indent=1)
+        with open(os.path.join(FIXTURE_DIR, f"{video_id}.ytdlp.json"), 'w') as f:
+            json.dump(ydl.sanitize_info(raw), f, indent=1)
+        print(f"Recorded {video_id}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--live', nargs='+', metavar='VIDEO_ID')
+    parser.add_argument('--record', nargs='+', metavar='VIDEO_ID')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record)
+    elif args.live:
+        bench_live(args.live, max(1, args.repeat // 10))
+    else:
+        bench_fixtures(args.repeat)
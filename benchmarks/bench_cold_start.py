@@ -0,0 +1,75 @@
+"""Measure how long a fresh worker takes to import main.py.
+
+Each run is a new interpreter (like a gunicorn worker boot) with
+``-X importtime``. Reports median wall time, the import time of main and
+the slowest modules by cumulative time.
+
+    python benchmarks/bench_cold_start.py [--repeat 5] [--top 10]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_once(module, env):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    # Lines look like "import time:  self [us] | cumulative | name"
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumulative_us, name = line.replace('import time:', '|').split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return wall, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='main')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Placeholder keys: startup must not need the network or valid credentials
+        env = dict(os.environ, CACHE_DIR=cache_dir)
+        env.setdefault('YOUTUBE_API_KEY', 'bench')
+        env.setdefault('GOOGLE_API_KEY', 'bench')
+
+        walls, totals, runs = [], [], []
+        for _ in range(args.repeat):
+            wall, modules = import_once(args.module, env)
+            walls.append(wall)
+            totals.append(modules[args.module][1] / 1e6)
+            runs.append(modules)
+
+    print(f"{args.module}: wall {statistics.median(walls) * 1000:.0f} ms "
+          f"(min {min(walls) * 1000:.0f}), import {statistics.median(totals) * 1000:.0f} ms "
+          f"over {args.repeat} runs")
+
+    # Direct imports of the module, by median cumulative time
+    last = runs[-1]
+    direct = [name for name, (_, _, depth) in last.items() if depth == 1]
+    cumulative = {name: statistics.median(run[name][1] for run in runs if name in run) for name in direct}
+    print(f"\nslowest imports of {args.module}:")
+    for name, us in sorted(cumulative.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
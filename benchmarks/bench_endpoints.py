@@ -0,0 +1,228 @@
+"""Offline endpoint benchmark: p50/p95 latency, throughput and peak memory.
+
+Runs main.app in-process against the fakes in fakes.py (recorded Data API
+responses, synthetic json3/VTT subtitles of several lengths, a fake Gemini
+with configurable latency), so results are reproducible and need no
+network, API keys or quota. Each scenario is driven by --concurrency client
+threads (one gthread worker's view; use load_test.py for whole servers),
+then re-run sequentially under tracemalloc for its peak Python memory.
+
+    python benchmarks/bench_endpoints.py
+    python benchmarks/bench_endpoints.py --scenario search summarize-long --concurrency 16
+    python benchmarks/bench_endpoints.py --json before.json
+    python benchmarks/bench_endpoints.py --compare before.json --threshold 0.2
+    python benchmarks/bench_endpoints.py --record
+
+--compare exits non-zero if any scenario's p95 or throughput is more than
+--threshold worse than the saved run. --record refreshes fixtures/youtube
+from the real Data API (needs YOUTUBE_API_KEY).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import resource
+import threading
+import statistics
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault('CACHE_DIR', tempfile.mkdtemp(prefix='tubenotes-bench-'))
+os.environ.setdefault('JOB_WORKERS', '0')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+RECORD_QUERY = 'python tutorial'
+
+
+def scenarios(main, fakes):
+    """name -> path for request ``n``. Every cold scenario uses a new query or
+    video per request, so it runs the whole pipeline instead of a cache hit."""
+    return {
+        'videos': lambda n: '/videos',
+        'search': lambda n: f'/search?query=bench+{n}',
+        'next': lambda n: f'/next?cursor={main.make_cursor(f"bench next {n}", "CDIQAA")}',
+        'summarize-short': lambda n: f'/summarize?videoId={fakes.video_id("S", n)}',
+        'summarize-medium': lambda n: f'/summarize?videoId={fakes.video_id("M", n)}',
+        'summarize-long': lambda n: f'/summarize?videoId={fakes.video_id("L", n)}',
+        'summarize-cached': lambda n: f'/summarize?videoId={fakes.video_id("S", 0)}',
+    }
+
+
+class Counter:
+    def __init__(self, start=1):
+        self.value = start
+        self.lock = threading.Lock()
+
+    def next(self):
+        with self.lock:
+            self.value += 1
+            return self.value
+
+
+def run_load(app, path, ids, requests, concurrency):
+    latencies = []
+    errors = []
+    remaining = [requests]
+    lock = threading.Lock()
+
+    def client():
+        client = app.test_client()
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            url = path(ids.next())
+            start = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors.append(f"{response.status_code} {url}")
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def peak_memory(app, path, ids, requests):
+    """Peak traced Python allocation (bytes) over ``requests`` sequential requests."""
+    client = app.test_client()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        for _ in range(requests):
+            client.get(path(ids.next()))
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def percentile(latencies, fraction):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def bench(app, name, path, ids, args):
+    app.test_client().get(path(ids.next()))  # Warm up imports and fixtures, not the measured keys
+    latencies, errors, elapsed = run_load(app, path, ids, args.requests, args.concurrency)
+    if errors:
+        print(f"  {name}: {len(errors)} failed, e.g. {errors[0]}", file=sys.stderr)
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'rps': len(latencies) / elapsed,
+        'peak_mb': peak_memory(app, path, ids, args.memory_requests) / 2 ** 20,
+    }
+
+
+def report(results):
+    print(f"{'scenario':<18} {'ok':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'req/s':>8} {'peak MB':>8}")
+    for name, result in results.items():
+        print(f"{name:<18} {result['requests']:>6} {result['errors']:>5} {result['p50_ms']:>9.1f} "
+              f"{result['p95_ms']:>9.1f} {result['rps']:>8.1f} {result['peak_mb']:>8.1f}")
+
+
+def compare(results, baseline, threshold):
+    """Print changes against a saved run; returns the regressed scenarios."""
+    regressions = []
+    print(f"\n{'scenario':<18} {'p95':>16} {'req/s':>16}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        p95 = result['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0.0
+        rps = result['rps'] / before['rps'] - 1 if before['rps'] else 0.0
+        regressed = p95 > threshold or rps < -threshold
+        print(f"{name:<18} {p95:>+15.0%} {rps:>+15.0%}{'  REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def record():
+    """Refresh fixtures/youtube with real partial responses."""
+    import listings
+    import fakes
+
+    if not listings.YOUTUBE_API_KEY:
+        raise SystemExit("--record needs YOUTUBE_API_KEY")
+    youtube = listings.get_youtube()
+    chart = youtube.videos().list(part='snippet,statistics', chart='mostPopular', maxResults=listings.PAGE_SIZE,
+                                  regionCode=listings.REGION, fields=listings.CHART_FIELDS).execute()
+    search = youtube.search().list(part='snippet', q=RECORD_QUERY, relevanceLanguage='en', maxResults=listings.PAGE_SIZE,
+                                   type='video', regionCode=listings.REGION, fields=listings.SEARCH_FIELDS).execute()
+    ids = ','.join(listings.item_video_id(item) for item in search.get('items', []))
+    stats = youtube.videos().list(part='statistics', id=ids, fields=listings.STATS_FIELDS).execute()
+
+    for name, data in (('chart', chart), ('search', search), ('statistics', stats)):
+        path = os.path.join(fakes.FIXTURE_DIR, 'youtube', f"{name}.json")
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1)
+        print(f"wrote {path} ({len(data.get('items', []))} items)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', nargs='+', help='Scenarios to run (default: all)')
+    parser.add_argument('--requests', type=int, default=40, help='Measured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--memory-requests', type=int, default=3)
+    parser.add_argument('--upstream-latency-ms', type=float, default=50)
+    parser.add_argument('--llm-latency-ms', type=float, default=300)
+    parser.add_argument('--llm-ms-per-1k-tokens', type=float, default=5)
+    parser.add_argument('--json', help='Save results to this file')
+    parser.add_argument('--compare', help='Compare with results saved by --json')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    parser.add_argument('--record', action='store_true', help='Refresh the Data API fixtures and exit')
+    args = parser.parse_args()
+
+    if args.record:
+        record()
+        return
+
+    os.environ.setdefault('YOUTUBE_API_KEY', 'offline')
+    os.environ.setdefault('GOOGLE_API_KEY', 'offline')
+    import main as app_module
+    import fakes
+    fakes.install(args.upstream_latency_ms / 1000, args.llm_latency_ms / 1000, args.llm_ms_per_1k_tokens / 1000)
+
+    available = scenarios(app_module, fakes)
+    names = args.scenario or list(available)
+    unknown = set(names) - set(available)
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(sorted(unknown))}; choose from {', '.join(available)}")
+
+    print(f"{args.requests} requests x {args.concurrency} clients per scenario, upstream "
+          f"{args.upstream_latency_ms:.0f} ms, LLM {args.llm_latency_ms:.0f} ms + {args.llm_ms_per_1k_tokens:g} ms/1k tokens")
+    ids = Counter()
+    results = {}
+    for name in names:
+        results[name] = bench(app_module.app, name, available[name], ids, args)
+    report(results)
+    print(f"\npeak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            raise SystemExit(f"Regressed: {', '.join(regressions)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Micro-benchmark subtitle parsing on synthetic 3-hour transcripts.
+
+Compares subtitle_parser with the inline parsing fetch_transcript used to do
+(string += per segment for json3, six uncompiled re.sub passes for VTT).
+
+    python benchmarks/bench_subtitle_parser.py [--hours 3] [--repeat 5]
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from subtitle_parser import parse_json3, parse_srv3, parse_vtt
+
+WORDS = ("so today we are going to talk about how the cache works and why "
+         "it matters for latency when you have a lot of users").split()
+
+
+def _words(i, n):
+    return [WORDS[(i * 7 + k) % len(WORDS)] for k in range(n)]
+
+
+def make_json3(hours):
+    events = []
+    for i in range(int(hours * 3600) // 2):
+        words = _words(i, 6)
+        segs = [{'utf8': words[0]}] + [{'utf8': ' ' + w, 'tOffsetMs': 300 * k} for k, w in enumerate(words[1:], 1)]
+        events.append({'tStartMs': i * 2000, 'dDurationMs': 2000, 'segs': segs})
+        events.append({'tStartMs': i * 2000 + 1990, 'dDurationMs': 10, 'aAppend': 1, 'segs': [{'utf8': '\n'}]})
+    return json.dumps({'wireMagic': 'pb3', 'events': events}).encode('utf-8')
+
+
+def make_srv3(hours):
+    parts = ['<?xml version="1.0" encoding="utf-8" ?><timedtext format="3"><body>']
+    for i in range(int(hours * 3600) // 2):
+        words = _words(i, 6)
+        parts.append(f'<p t="{i * 2000}" d="2000">{words[0]}' + ''.join(f'<s t="{300 * k}"> {w}</s>' for k, w in enumerate(words[1:], 1)) + '</p>')
+    parts.append('</body></timedtext>')
+    return ''.join(parts).encode('utf-8')
+
+
+def _ts(ms):
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}.{ms % 1000:03d}"
+
+
+def make_vtt(hours):
+    # YouTube auto-caption style: each cue repeats the previous line (rolling)
+    parts = ['WEBVTT\nKind: captions\nLanguage: en\n\n']
+    previous = ''
+    for i in range(int(hours * 3600) // 2):
+        start = i * 2000
+        line = ' '.join(_words(i, 6))
+        timed = '<c> '.join(f"{w}</c><{_ts(start + 300 * k)}>" for k, w in enumerate(line.split()))
+        parts.append(f"{_ts(start)} --> {_ts(start + 1990)} align:start position:0%\n{previous}\n{timed}\n\n")
+        parts.append(f"{_ts(start + 1990)} --> {_ts(start + 2000)} align:start position:0%\n{line}\n \n\n")
+        previous = line
+    return ''.join(parts).encode('utf-8')
+
+
+def legacy_json3(content):
+    transcript_text = ""
+    data = json.loads(content)
+    if 'events' in data:
+        for event in data['events']:
+            if 'segs' in event:
+                for seg in event['segs']:
+                    if 'utf8' in seg:
+                        transcript_text += seg['utf8'] + " "
+    return transcript_text.strip()
+
+
+def legacy_vtt(content):
+    text = content.decode('utf-8', errors='ignore')
+    text = re.sub(r'WEBVTT\n', '', text)
+    text = re.sub(r'Kind:.*\n', '', text)
+    text = re.sub(r'Language:.*\n', '', text)
+    text = re.sub(r'\d{2}:\d{2}:\d{2}\.\d{3} --> \d{2}:\d{2}:\d{2}\.\d{3}', '', text)
+    text = re.sub(r'\n\d+\n', ' ', text)
+    text = re.sub(r'<[^>]+>', '', text)
+    return ' '.join(text.split())
+
+
+def measure(fn, content, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(content)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000, peak / 1024 / 1024, result
+
+
+def text_of(result):
+    return result if isinstance(result, str) else result.text
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=float, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fixtures = {
+        'json3': make_json3(args.hours),
+        'srv3': make_srv3(args.hours),
+        'vtt': make_vtt(args.hours),
+    }
+    cases = [
+        ('json3', 'legacy', legacy_json3),
+        ('json3', 'parser', parse_json3),
+        ('srv3', 'parser', parse_srv3),
+        ('vtt', 'legacy', legacy_vtt),
+        ('vtt', 'parser', parse_vtt),
+    ]
+
+    print(f"{args.hours:g}h transcripts")
+    print(f"{'format':<8}{'impl':<8}{'input KB':>10}{'best ms':>10}{'peak MB':>10}{'text chars':>12}")
+    for fmt, name, fn in cases:
+        content = fixtures[fmt]
+        ms, peak, result = measure(fn, content, args.repeat)
+        print(f"{fmt:<8}{name:<8}{len(content) // 1024:>10}{ms:>10.1f}{peak:>10.1f}{len(text_of(result)):>12}")
@@ -0,0 +1,262 @@
+"""Offline stand-ins for every upstream main.py talks to.
+
+- YouTube Data API: recorded responses in fixtures/youtube (refresh them
+  with ``python benchmarks/bench_endpoints.py --record``). Search results
+  get video IDs derived from the query, so different queries miss the
+  statistics cache like real ones do.
+- Captions: the InnerTube player request answers with the recorded player
+  response from fixtures/captions pointing at a caption track for the
+  requested video, and the subtitle download returns a synthetic json3 or
+  VTT transcript whose length depends on the video ID (see VIDEO_LENGTHS).
+- Gemini: FakeModel answers generate_content / count_tokens with a
+  schema-shaped summary after a configurable latency.
+
+Every fake sleeps instead of doing network I/O, so requests stay I/O bound
+like in production.
+
+    import fakes
+    fakes.install(upstream_latency=0.15, llm_latency=0.8)
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import threading
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_subtitle_parser import make_json3, make_vtt
+from transcript_compression import estimate_tokens
+
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+# First character of a fake video ID -> (subtitle format, video length in hours)
+VIDEO_LENGTHS = {
+    'S': ('json3', 0.15),  # ~9 minute talk
+    'M': ('vtt', 0.75),    # ~45 minute lecture
+    'L': ('json3', 3),     # 3 hour stream
+}
+
+_subtitles = {}
+_subtitles_lock = threading.Lock()
+
+
+def video_id(length, n):
+    """Fake 11-character video ID with a transcript of ``length`` ('S', 'M' or 'L')."""
+    return f"{length}{n:010d}"
+
+
+def load_fixture(*parts):
+    with open(os.path.join(FIXTURE_DIR, *parts)) as f:
+        return json.load(f)
+
+
+def subtitle_fixture(video_id):
+    """Subtitle file (bytes) served for ``video_id``.
+
+    The bulk is built once per length; a first cue naming the video keeps
+    transcripts distinct, so summaries aren't cache hits across videos.
+    """
+    length = video_id[:1] if video_id[:1] in VIDEO_LENGTHS else 'S'
+    fmt, hours = VIDEO_LENGTHS[length]
+    with _subtitles_lock:
+        if length not in _subtitles:
+            _subtitles[length] = make_json3(hours) if fmt == 'json3' else make_vtt(hours)
+        content = _subtitles[length]
+
+    if fmt == 'json3':
+        head, events = content.split(b'[', 1)
+        cue = json.dumps({'tStartMs': 0, 'dDurationMs': 1, 'segs': [{'utf8': f"video {video_id}"}]})
+        return head + b'[' + cue.encode('utf-8') + b', ' + events
+    head, cues = content.split(b'\n\n', 1)
+    return head + f"\n\n00:00:00.000 --> 00:00:00.001\nvideo {video_id}\n\n".encode('utf-8') + cues
+
+
+# YouTube Data API
+
+def _reseed(item, seed, i):
+    """Copy of a recorded search item with a video ID derived from ``seed``."""
+    video_id = f"{zlib.crc32(seed.encode('utf-8')):08x}{i:03d}"[:11]
+    return dict(item, id={'videoId': video_id})
+
+
+class _Request:
+    def __init__(self, response, latency):
+        self.response = response
+        self.latency = latency
+
+    def execute(self, http=None, num_retries=0):
+        time.sleep(self.latency)
+        return self.response
+
+
+class _Collection:
+    def __init__(self, respond, latency):
+        self.respond = respond
+        self.latency = latency
+
+    def list(self, **params):
+        return _Request(self.respond(params), self.latency)
+
+
+class FakeYouTube:
+    """Replays fixtures/youtube for videos().list and search().list."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.chart = load_fixture('youtube', 'chart.json')
+        self.search_page = load_fixture('youtube', 'search.json')
+        self.statistics = load_fixture('youtube', 'statistics.json')['items']
+
+    def _page(self, page, page_token):
+        page = dict(page)
+        if page_token:
+            page['prevPageToken'] = page_token
+        return page
+
+    def videos_response(self, params):
+        if params.get('chart'):
+            return self._page(self.chart, params.get('pageToken'))
+        return {'items': [{'id': video_id, 'statistics': self.statistics[i % len(self.statistics)]['statistics']}
+                          for i, video_id in enumerate(params['id'].split(','))]}
+
+    def search_response(self, params):
+        seed = f"{params['q']}:{params.get('pageToken')}"
+        page = dict(self.search_page, items=[_reseed(item, seed, i) for i, item in enumerate(self.search_page['items'])])
+        return self._page(page, params.get('pageToken'))
+
+    def videos(self):
+        return _Collection(self.videos_response, self.latency)
+
+    def search(self):
+        return _Collection(self.search_response, self.latency)
+
+
+# Captions (InnerTube player request, subtitle download, transcript API)
+
+class FakeCaptions:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.player = load_fixture('captions', 'GisSNuVpbkM.player.json')
+
+    def post_json(self, url, payload, proxy=None):
+        time.sleep(self.latency)
+        video_id = payload['videoId']
+        track = {
+            'baseUrl': f"https://www.youtube.com/api/timedtext?v={video_id}&caps=asr&lang=en&kind=asr",
+            'languageCode': 'en',
+            'kind': 'asr',
+        }
+        return dict(self.player, videoDetails=dict(self.player.get('videoDetails', {}), videoId=video_id),
+                    captions={'playerCaptionsTracklistRenderer': {'captionTracks': [track]}})
+
+    def get(self, url, proxy=None, headers=None):
+        time.sleep(self.latency)
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+        return subtitle_fixture(query['v'][0])
+
+    def get_transcript(self, video_id, languages=None):
+        from subtitle_parser import parse_subtitles
+        time.sleep(self.latency)
+        return [{'text': text, 'start': start / 1000, 'duration': duration / 1000}
+                for start, duration, text in parse_subtitles(subtitle_fixture(video_id))]
+
+
+# Gemini
+
+class _Usage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class _Response:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class _Count:
+    def __init__(self, total_tokens):
+        self.total_tokens = total_tokens
+
+
+class _Stream:
+    """Iterable of text chunks, like a streamed GenerateContentResponse."""
+
+    def __init__(self, chunks, delay, usage):
+        self.chunks = chunks
+        self.delay = delay
+        self.usage_metadata = usage
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            time.sleep(self.delay)
+            yield _Response(chunk)
+
+
+class FakeModel:
+    """generate_content after ``latency`` seconds plus ``per_1k_tokens`` per
+    thousand prompt tokens; streams in ``stream_chunks`` pieces."""
+
+    SECTIONS = 5
+
+    def __init__(self, latency=0.0, per_1k_tokens=0.0, stream_chunks=8):
+        self.latency = latency
+        self.per_1k_tokens = per_1k_tokens
+        self.stream_chunks = stream_chunks
+
+    def _summary(self, prompt, tokens):
+        words = prompt.split()
+        sections = []
+        for i in range(self.SECTIONS):
+            start = len(words) * i // self.SECTIONS
+            sections.append({
+                'header': ' '.join(words[start:start + 4]).title() or f"Section {i + 1}",
+                'bullets': [' '.join(words[start + 4:start + 16]), ' '.join(words[start + 16:start + 28])],
+            })
+        text = json.dumps({'sections': sections})
+        return text, _Usage(tokens, estimate_tokens(text))
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        tokens = estimate_tokens(prompt)
+        delay = self.latency + self.per_1k_tokens * tokens / 1000
+        text, usage = self._summary(prompt, tokens)
+        if not stream:
+            time.sleep(delay)
+            return _Response(text, usage)
+
+        size = -(-len(text) // self.stream_chunks)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        return _Stream(chunks, delay / len(chunks), usage)
+
+    def count_tokens(self, text):
+        time.sleep(self.latency / 10)
+        return _Count(estimate_tokens(text))
+
+
+def install(upstream_latency=0.0, llm_latency=0.0, llm_per_1k_tokens=0.0):
+    """Point listings, captions, http_client, main and summarize at the fakes.
+
+    Call after ``import main`` (it imports them all); rate limits are
+    switched off so clients aren't throttled.
+    """
+    import captions
+    import http_client
+    import listings
+    import main
+    import summarize
+
+    youtube = FakeYouTube(upstream_latency)
+    listings.get_youtube = lambda: youtube
+
+    fake_captions = FakeCaptions(upstream_latency)
+    captions.post_json = fake_captions.post_json
+    http_client.get = fake_captions.get
+    main.YouTubeTranscriptApi = fake_captions
+
+    summarize.model = FakeModel(llm_latency, llm_per_1k_tokens)
+    main.limiter.enabled = False
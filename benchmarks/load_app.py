@@ -0,0 +1,27 @@
+"""main.app for load tests: every upstream (YouTube Data API, captions,
+Gemini) is replaced by the offline fakes in fakes.py, and rate limits are off.
+
+Every request stays I/O bound (like production, where it waits on YouTube)
+without touching the network or spending quota. UPSTREAM_LATENCY_MS sets
+the YouTube/caption latency, LLM_LATENCY_MS the Gemini one.
+
+    gunicorn -c gunicorn.conf.py --pythonpath benchmarks load_app:app
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault('YOUTUBE_API_KEY', 'load-test')
+os.environ.setdefault('GOOGLE_API_KEY', 'load-test')
+
+import main
+import fakes
+
+fakes.install(
+    upstream_latency=float(os.environ.get('UPSTREAM_LATENCY_MS', 150)) / 1000,
+    llm_latency=float(os.environ.get('LLM_LATENCY_MS', 800)) / 1000,
+)
+
+app = main.app
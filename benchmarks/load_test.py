@@ -0,0 +1,139 @@
+"""HTTP load test: requests per second (and per core) under concurrency.
+
+By default it starts gunicorn with gunicorn.conf.py on benchmarks/load_app.py
+(fake YouTube API with UPSTREAM_LATENCY_MS per call, no rate limits) and
+runs every requested worker class, so sync and gthread can be compared:
+
+    python benchmarks/load_test.py --worker-class sync gthread --duration 10
+    python benchmarks/load_test.py --url http://localhost:8000 --cores 2
+
+Each request uses a unique search query, so the listing caches miss and
+every request waits on the (fake) upstream like a cold production request.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+import http.client
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_server(port, worker_class, workers, threads, latency_ms, cache_dir):
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        GUNICORN_WORKER_CLASS=worker_class,
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_THREADS=str(threads),
+        UPSTREAM_LATENCY_MS=str(latency_ms),
+        CACHE_DIR=cache_dir,
+        JOB_WORKERS='0',
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--pythonpath', 'benchmarks', 'load_app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/privacy-policy')
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise SystemExit(f"gunicorn ({worker_class}) didn't start on port {port}")
+
+
+def run_load(base_url, path, concurrency, duration):
+    parsed = urllib.parse.urlparse(base_url)
+    latencies = []
+    errors = [0]
+    counter = iter(range(10 ** 9))
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+        while time.perf_counter() < deadline:
+            with lock:
+                n = next(counter)
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path.format(n=n))
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+                ok = False
+            with lock:
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors[0] += 1
+
+    started = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def report(label, latencies, errors, elapsed, cores):
+    rps = len(latencies) / elapsed
+    latencies.sort()
+    p50 = statistics.median(latencies) if latencies else 0
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    print(f"{label:<24} {len(latencies):>7} ok {errors:>5} err  {rps:8.1f} req/s  "
+          f"{rps / cores:8.1f} req/s/core  p50 {p50 * 1000:6.0f} ms  p95 {p95 * 1000:6.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='Load an already running server instead of starting one')
+    parser.add_argument('--cores', type=int, help='Cores serving --url (default: this machine)')
+    parser.add_argument('--path', default='/search?query=load+test+{n}')
+    parser.add_argument('--worker-class', nargs='+', default=['gthread'])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--latency-ms', type=float, default=150)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.url:
+        cores = args.cores or os.cpu_count()
+        latencies, errors, elapsed = run_load(args.url, args.path, args.concurrency, args.duration)
+        report(args.url, latencies, errors, elapsed, cores)
+        return
+
+    cores = min(args.workers, os.cpu_count())
+    print(f"{args.workers} worker(s) on {cores} core(s), {args.threads} threads (gthread), "
+          f"upstream latency {args.latency_ms:.0f} ms, {args.concurrency} clients, {args.duration:.0f}s")
+    for worker_class in args.worker_class:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            server = start_server(args.port, worker_class, args.workers, args.threads, args.latency_ms, cache_dir)
+            try:
+                latencies, errors, elapsed = run_load(
+                    f"http://127.0.0.1:{args.port}", args.path, args.concurrency, args.duration)
+            finally:
+                server.terminate()
+                server.wait()
+        report(worker_class, latencies, errors, elapsed, cores)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+# Persistent cache setup
+import os
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+# All cache databases live here so they survive gunicorn restarts
+CACHE_DIR = os.environ.get(
+    'CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+
+# Optional Redis-protocol server for the shared tier (and rate limits), for
+# deployments that run on more than one host
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+# Bytes of each SQLite file read through a memory map instead of read()
+CACHE_MMAP_BYTES = int(os.environ.get('CACHE_MMAP_MB', 256)) * 1024 * 1024
+
+
+class SQLiteCache:
+    """Size-bounded LRU cache stored in SQLite with zlib-compressed values.
+
+    Values are anything ``json.dumps`` accepts. Each entry has its own TTL and
+    the least recently used entries are evicted once the table grows past
+    ``max_bytes`` of compressed data. The database file is shared by every
+    process that opens it, so all gunicorn workers see the same entries.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, default_ttl=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        # Bytes written since the last size check; the check sums the whole
+        # table, so it runs once per ~1% of max_bytes instead of every set
+        self._unchecked = max_bytes
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)")
+
+    def _connect(self):
+        # One connection per thread, re-opened after a fork (gunicorn preload)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={CACHE_MMAP_BYTES}")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def get(self, key):
+        """Return the cached value for ``key``, or None if missing or expired."""
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            self._count('misses')
+            return None
+
+        value, expires_at = row
+        if expires_at is not None and expires_at <= now:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._count('expired')
+            self._count('misses')
+            return None
+
+        conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self._count('hits')
+        return json.loads(zlib.decompress(value))
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys that are cached and not expired."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        conn = self._connect()
+        now = time.time()
+        rows = conn.execute(
+            f"SELECT key, value FROM cache WHERE key IN ({','.join('?' * len(keys))}) "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (*keys, now)
+        ).fetchall()
+
+        found = {key: json.loads(zlib.decompress(value)) for key, value in rows}
+        if found:
+            conn.execute(
+                f"UPDATE cache SET accessed_at = ? WHERE key IN ({','.join('?' * len(found))})",
+                (now, *found)
+            )
+        self._count('hits', len(found))
+        self._count('misses', len(keys) - len(found))
+        return found
+
+    def set(self, key, value, ttl=None):
+        """Store ``value`` under ``key`` for ``ttl`` seconds (None = default TTL)."""
+        self.set_many({key: value}, ttl=ttl)
+
+    def set_many(self, items, ttl=None):
+        """Store several values in one transaction."""
+        if ttl is None:
+            ttl = self.default_ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        rows = []
+        for key, value in items.items():
+            blob = zlib.compress(json.dumps(value).encode('utf-8'))
+            rows.append((key, blob, len(blob), expires_at, now))
+        if not rows:
+            return
+
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+        with self._stats_lock:
+            self._unchecked += sum(row[2] for row in rows)
+            check = self._unchecked >= self.max_bytes // 100
+            if check:
+                self._unchecked = 0
+        if check:
+            self._evict(conn)
+
+    def delete(self, key):
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        self._connect().execute("DELETE FROM cache")
+
+    def _evict(self, conn):
+        # Drop expired rows first, then least recently used until under budget
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        self._count('evictions', evicted)
+
+    def info(self):
+        """Counters plus current entry count and size, for logging/monitoring."""
+        entries, size = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()
+        with self._stats_lock:
+            info = dict(self.stats)
+        info['entries'] = entries
+        info['bytes'] = size
+        return info
+
+
+class RedisCache:
+    """Same interface as SQLiteCache, stored in Redis under ``prefix``.
+
+    Size bounds come from the server's ``maxmemory`` / eviction policy rather
+    than ``max_bytes``. Needs the optional ``redis`` package.
+    """
+
+    def __init__(self, url, prefix, default_ttl=None):
+        import redis
+
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+        self._client = redis.Redis.from_url(url)
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def get(self, key):
+        value = self._client.get(self.prefix + key)
+        if value is None:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return json.loads(zlib.decompress(value))
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._client.mget([self.prefix + key for key in keys])
+        found = {key: json.loads(zlib.decompress(value)) for key, value in zip(keys, values) if value is not None}
+        self._count('hits', len(found))
+        self._count('misses', len(keys) - len(found))
+        return found
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl=ttl)
+
+    def set_many(self, items, ttl=None):
+        if ttl is None:
+            ttl = self.default_ttl
+        pipeline = self._client.pipeline(transaction=False)
+        for key, value in items.items():
+            blob = zlib.compress(json.dumps(value).encode('utf-8'))
+            pipeline.set(self.prefix + key, blob, ex=max(1, int(ttl)) if ttl else None)
+        pipeline.execute()
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self.prefix + '*'):
+            self._client.delete(key)
+
+    def info(self):
+        with self._stats_lock:
+            info = dict(self.stats)
+        info['entries'] = sum(1 for _ in self._client.scan_iter(match=self.prefix + '*'))
+        return info
+
+
+def shared_cache(name, max_bytes=256 * 1024 * 1024, default_ttl=None):
+    """Cache tier shared by every worker: ``<CACHE_DIR>/<name>.db``, or a
+    ``<name>:`` key prefix in Redis when CACHE_REDIS_URL is set."""
+    if CACHE_REDIS_URL:
+        return RedisCache(CACHE_REDIS_URL, prefix=f"{name}:", default_ttl=default_ttl)
+    return SQLiteCache(os.path.join(CACHE_DIR, f"{name}.db"), max_bytes=max_bytes, default_ttl=default_ttl)
@@ -0,0 +1,92 @@
+# Lightweight caption discovery
+import os
+from http_client import post_json
+
+# A single InnerTube /player call returns the caption track list without the
+# format resolution, signature and player JS work yt-dlp's extract_info does
+INNERTUBE_PLAYER_URL = 'https://www.youtube.com/youtubei/v1/player?prettyPrint=false'
+
+INNERTUBE_CLIENTS = {
+    'WEB': {'clientName': 'WEB', 'clientVersion': '2.20250101.00.00'},
+    'ANDROID': {'clientName': 'ANDROID', 'clientVersion': '19.44.38', 'androidSdkVersion': 30},
+    'IOS': {'clientName': 'IOS', 'clientVersion': '19.45.4', 'deviceModel': 'iPhone16,2'},
+}
+
+CAPTION_PLAYER_CLIENT = os.environ.get('CAPTION_PLAYER_CLIENT', 'WEB')
+CAPTION_PLAYER_CLIENT_VERSION = os.environ.get('CAPTION_PLAYER_CLIENT_VERSION')
+
+# Preferred subtitle formats, best first (same order as the yt-dlp path)
+SUBTITLE_FORMATS = ['json3', 'srv3', 'srv2', 'srv1']
+
+
+def fetch_player_response(video_id, proxy=None, client=CAPTION_PLAYER_CLIENT):
+    """Minimal InnerTube player request for ``video_id``."""
+    context = dict(INNERTUBE_CLIENTS[client], hl='en')
+    if CAPTION_PLAYER_CLIENT_VERSION:
+        context['clientVersion'] = CAPTION_PLAYER_CLIENT_VERSION
+
+    return post_json(
+        INNERTUBE_PLAYER_URL,
+        {'context': {'client': context}, 'videoId': video_id},
+        proxy=proxy
+    )
+
+
+def select_caption_url(player_response, lang='en'):
+    """Pick the best caption track from a player response.
+
+    Manual tracks win over auto-generated (``kind == 'asr'``) ones. Returns
+    (url, kind) with the URL asking for json3, or (None, None) if the video
+    has no track in ``lang``.
+    """
+    status = player_response.get('playabilityStatus', {})
+    if status.get('status') not in (None, 'OK'):
+        raise Exception(f"Video unavailable: {status.get('reason') or status.get('status')}")
+
+    tracks = (player_response.get('captions', {})
+              .get('playerCaptionsTracklistRenderer', {})
+              .get('captionTracks', []))
+
+    manual = None
+    automatic = None
+    for track in tracks:
+        code = track.get('languageCode', '')
+        if code != lang and not code.startswith(f"{lang}-"):
+            continue
+        if track.get('kind') == 'asr':
+            automatic = automatic or track
+        else:
+            manual = manual or track
+
+    track = manual or automatic
+    if not track or not track.get('baseUrl'):
+        return None, None
+
+    url = track['baseUrl']
+    if 'fmt=' not in url:
+        url += '&fmt=json3'
+    return url, 'asr' if track is automatic else 'manual'
+
+
+def select_subtitle_url(info, lang='en'):
+    """Same selection on a yt-dlp info dict (the full extract_info path)."""
+    subtitles = None
+    if 'subtitles' in info and lang in info['subtitles']:
+        subtitles = info['subtitles'][lang]
+    elif 'automatic_captions' in info and lang in info['automatic_captions']:
+        subtitles = info['automatic_captions'][lang]
+
+    if not subtitles:
+        return None, None
+
+    for ext in SUBTITLE_FORMATS:
+        for sub in subtitles:
+            if sub.get('ext') == ext and sub.get('url'):
+                return sub['url'], ext
+    return subtitles[0].get('url'), subtitles[0].get('ext')
+
+
+def discover_caption_url(video_id, proxy=None, lang='en'):
+    """Return the json3 caption URL for a video using one player request."""
+    url, kind = select_caption_url(fetch_player_response(video_id, proxy=proxy), lang=lang)
+    return url
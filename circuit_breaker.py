@@ -0,0 +1,150 @@
+# Circuit breaker for upstream methods (transcript fetching)
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class _Circuit:
+    def __init__(self, window, cooldown):
+        self.outcomes = deque(maxlen=window)  # (ok, latency seconds)
+        self.state = 'closed'
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self.probe_started = None
+        self.probe = 0  # Token of the current probe call
+        self.last_error = None
+
+
+class CircuitBreaker:
+    """Per-key circuit breaker over a rolling window of recent outcomes.
+
+    closed    - calls go through. The circuit opens once the last ``window``
+                calls (at least ``min_calls``) failed at ``failure_rate`` or
+                more, or at once on a ``trip`` failure (e.g. a bot check,
+                which the next calls would hit too).
+    open      - calls are skipped for ``cooldown`` seconds. The cooldown
+                doubles after every failed probe, up to ``max_cooldown``.
+    half_open - after the cooldown one call is let through as a probe;
+                success closes the circuit, failure opens it again. A probe
+                that never reports back (cancelled) is replaced after
+                ``probe_timeout``. Only the probe decides: ``select`` hands
+                out a token for it, and outcomes recorded without the
+                current token (calls started before the circuit opened, a
+                replaced probe) are ignored while half-open.
+
+    ``select`` also orders the allowed keys: probes first (they need real
+    traffic), then by recent success rate and latency.
+    """
+
+    def __init__(self, window=20, min_calls=5, failure_rate=0.5, cooldown=30, max_cooldown=600,
+                 probe_timeout=120, latency_bucket=1.0, clock=time.monotonic):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+        self.latency_bucket = latency_bucket
+        self.clock = clock
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, key):
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit(self.window, self.cooldown)
+        return circuit
+
+    def _allow(self, circuit, now):
+        """'call', 'probe' or None (skip); reserves the probe slot."""
+        if circuit.state == 'closed':
+            return 'call'
+        if circuit.state == 'open' and now - circuit.opened_at < circuit.cooldown:
+            return None
+        if circuit.probe_started is not None and now - circuit.probe_started < self.probe_timeout:
+            return None  # Someone else is probing
+        circuit.state = 'half_open'
+        circuit.probe_started = now
+        circuit.probe += 1
+        return 'probe'
+
+    @staticmethod
+    def _rates(circuit):
+        """(success rate, mean latency of successful calls) of the window."""
+        if not circuit.outcomes:
+            return 1.0, 0.0
+        latencies = [latency for ok, latency in circuit.outcomes if ok]
+        success_rate = len(latencies) / len(circuit.outcomes)
+        return success_rate, sum(latencies) / len(latencies) if latencies else 0.0
+
+    def select(self, keys):
+        """Split ``keys`` into (allowed, in call order), skipped and probes.
+
+        ``probes`` maps the allowed keys that are probe calls to the token
+        their outcome must be recorded with.
+        """
+        now = self.clock()
+        allowed = []
+        skipped = []
+        probes = {}
+        with self._lock:
+            for position, key in enumerate(keys):
+                circuit = self._circuit(key)
+                decision = self._allow(circuit, now)
+                if decision is None:
+                    skipped.append(key)
+                    continue
+                if decision == 'probe':
+                    probes[key] = circuit.probe
+                success_rate, latency = self._rates(circuit)
+                # Rounded so noise doesn't reorder; ties keep the given order
+                allowed.append(((decision != 'probe', -round(success_rate, 1),
+                                 int(latency / self.latency_bucket), position), key))
+        return [key for _, key in sorted(allowed)], skipped, probes
+
+    def record(self, key, ok, latency, error=None, trip=False, probe=None):
+        with self._lock:
+            circuit = self._circuit(key)
+            if circuit.state == 'half_open' and probe != circuit.probe:
+                return  # Not the probe; only its outcome decides
+            circuit.outcomes.append((ok, latency))
+            if not ok:
+                circuit.last_error = error
+
+            if circuit.state == 'half_open':
+                circuit.probe_started = None
+                if ok:
+                    circuit.state = 'closed'
+                    circuit.cooldown = self.cooldown
+                    circuit.outcomes.clear()
+                    logger.info("Circuit %s closed after a successful probe", key)
+                else:
+                    circuit.cooldown = min(circuit.cooldown * 2, self.max_cooldown)
+                    self._open(key, circuit)
+            elif circuit.state == 'closed' and not ok:
+                failures = sum(1 for outcome, _ in circuit.outcomes if not outcome)
+                if trip or (len(circuit.outcomes) >= self.min_calls
+                            and failures / len(circuit.outcomes) >= self.failure_rate):
+                    self._open(key, circuit)
+
+    def _open(self, key, circuit):
+        circuit.state = 'open'
+        circuit.opened_at = self.clock()
+        logger.warning("Circuit %s open for %ds: %s", key, circuit.cooldown, circuit.last_error)
+
+    def last_error(self, key):
+        with self._lock:
+            return self._circuit(key).last_error
+
+    def info(self):
+        """State, success rate, latency and window size per key."""
+        with self._lock:
+            info = {}
+            for key, circuit in self._circuits.items():
+                success_rate, latency = self._rates(circuit)
+                info[key] = {'state': circuit.state, 'success_rate': success_rate,
+                             'latency': latency, 'calls': len(circuit.outcomes)}
+            return info
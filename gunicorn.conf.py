@@ -0,0 +1,34 @@
+# gunicorn settings (read automatically from the working directory)
+#
+# Requests spend nearly all their time waiting on YouTube, the proxy and
+# Gemini, so each worker process runs a pool of threads instead of serving
+# one request at a time. Every shared client is thread-safe: per-thread
+# YouTube service objects (listings.get_youtube), pooled urllib3 managers
+# (http_client) and per-thread SQLite connections (cache).
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# gunicorn silently upgrades sync workers to gthread when threads > 1
+threads = int(os.environ.get('GUNICORN_THREADS', 16)) if worker_class == 'gthread' else 1
+
+# Summaries can take 40s+ on long videos; SSE streams hold their thread
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+
+def post_worker_init(worker):
+    # Jobs queued before a restart shouldn't wait for the next submission.
+    # Started here rather than on import, so --preload's master runs none
+    from main import job_queue
+    job_queue.start()
+
+
+def child_exit(server, worker):
+    # Drop the worker's metrics snapshot so /metrics stops summing it
+    import metrics
+    metrics.remove_snapshot(worker.pid)
@@ -0,0 +1,148 @@
+# HTTP caching: validators, Cache-Control, compression, versioned static URLs
+import os
+import gzip
+import hashlib
+import threading
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip only
+    brotli = None
+
+# Responses smaller than this aren't worth the CPU (and may grow)
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/javascript', 'text/javascript',
+    'text/html', 'text/css', 'text/plain', 'image/svg+xml',
+}
+
+# Static files are requested with ?v=<content hash> (see static_url_version),
+# so those URLs never change content and can be cached for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_versions = {}   # filename -> (mtime, version)
+_static_bodies = {}  # (filename, etag, encoding) -> compressed bytes
+_lock = threading.Lock()
+
+
+def cacheable(response, max_age, public=True):
+    """Add Cache-Control and a strong ETag (hash of the body) to a response.
+
+    ``max_age=0`` means "revalidate every time": browsers keep the copy but
+    get a 304 instead of the body while it hasn't changed.
+    """
+    visibility = 'public' if public else 'private'
+    response.headers['Cache-Control'] = f"{visibility}, max-age={max_age}" if max_age else f"{visibility}, no-cache"
+    response.set_etag(hashlib.sha256(response.get_data()).hexdigest()[:32])
+    return response
+
+
+def static_version(static_folder, filename):
+    """Short content hash of a static file, recomputed when it changes."""
+    path = os.path.join(static_folder, filename)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _versions.get(filename)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:12]
+    with _lock:
+        _versions[filename] = (mtime, version)
+    return version
+
+
+def _not_modified(response):
+    """Turn a 200 into a bodiless 304, keeping the validator headers."""
+    if hasattr(response.response, 'close'):
+        response.response.close()  # Open static file
+    response.direct_passthrough = False
+    response.status_code = 304
+    response.set_data(b'')
+    for header in ('Content-Length', 'Content-Type', 'Content-Encoding'):
+        response.headers.pop(header, None)
+    return response
+
+
+def _encoding():
+    accept = request.accept_encodings
+    if brotli is not None and accept['br']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def finalize(response, static_folder):
+    """after_request hook: static Cache-Control, 304s and compression.
+
+    A compressed body gets its own strong ETag (``<tag>-gzip``/``<tag>-br``),
+    since it is a different byte sequence; either form revalidates.
+    """
+    if request.endpoint == 'static' and response.status_code in (200, 304):
+        filename = request.view_args.get('filename')
+        version = request.args.get('v')
+        if version and version == static_version(static_folder, filename):
+            response.headers['Cache-Control'] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            response.headers['Cache-Control'] = 'public, no-cache'
+
+    if response.status_code != 200 or request.method not in ('GET', 'HEAD'):
+        return response
+
+    compressible = response.mimetype in COMPRESSIBLE_TYPES and 'Content-Encoding' not in response.headers \
+        and not (response.is_streamed and not response.direct_passthrough)
+    if compressible:
+        response.vary.add('Accept-Encoding')
+
+    etag, weak = response.get_etag()
+    if etag:
+        for tag in (etag, f"{etag}-gzip", f"{etag}-br"):
+            if request.if_none_match.contains_weak(tag):
+                response.set_etag(tag, weak)
+                return _not_modified(response)
+
+    if not compressible:
+        return response
+    encoding = _encoding()
+    if encoding is None:
+        return response
+
+    if response.direct_passthrough:
+        # Static file: compress once per version instead of on every request
+        key = (request.view_args.get('filename'), etag, encoding)
+        body = _static_bodies.get(key)
+        if body is None:
+            response.direct_passthrough = False
+            data = response.get_data()
+            if len(data) < COMPRESS_MIN_BYTES:
+                return response
+            body = _compress(data, encoding)
+            with _lock:
+                _static_bodies[key] = body
+        else:
+            response.response.close()
+            response.direct_passthrough = False
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        body = _compress(data, encoding)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
@@ -0,0 +1,85 @@
+# Shared HTTP connection pools
+import os
+import json
+import threading
+import urllib.parse
+import urllib3
+from urllib3.util import Retry, Timeout, make_headers, parse_url
+
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 30))
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 2))
+HTTP_BACKOFF = float(os.environ.get('HTTP_BACKOFF', 0.5))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# One pool manager per proxy URL (None = direct). Pool managers are
+# thread-safe and keep connections (and proxy CONNECT tunnels) alive per host
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def _new_manager(proxy):
+    options = {
+        'num_pools': 20,
+        'maxsize': HTTP_POOL_SIZE,
+        'timeout': Timeout(connect=HTTP_CONNECT_TIMEOUT, read=HTTP_READ_TIMEOUT),
+        'retries': Retry(
+            total=HTTP_RETRIES,
+            backoff_factor=HTTP_BACKOFF,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=None,  # Our POSTs (player requests) are idempotent
+            raise_on_status=False,
+        ),
+        'headers': {'User-Agent': USER_AGENT},
+    }
+    if not proxy:
+        return urllib3.PoolManager(**options)
+
+    # Credentials in the proxy URL go in Proxy-Authorization instead
+    parsed = parse_url(proxy)
+    proxy_headers = make_headers(proxy_basic_auth=urllib.parse.unquote(parsed.auth)) if parsed.auth else None
+    bare = parsed._replace(auth=None).url
+    return urllib3.ProxyManager(bare, proxy_headers=proxy_headers, **options)
+
+
+def get_manager(proxy=None):
+    # Re-created after fork so workers never share sockets with the master
+    key = (proxy, os.getpid())
+    manager = _managers.get(key)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(key)
+            if manager is None:
+                manager = _managers[key] = _new_manager(proxy)
+    return manager
+
+
+class HTTPError(Exception):
+    def __init__(self, status, url):
+        super().__init__(f"HTTP {status} for {url.split('?')[0]}")
+        self.status = status
+
+
+def request(method, url, proxy=None, headers=None, body=None):
+    """Send a request through the shared pool and return the response body."""
+    manager = get_manager(proxy)
+    response = manager.request(method, url, headers=dict(manager.headers, **(headers or {})), body=body)
+    if response.status >= 400:
+        raise HTTPError(response.status, url)
+    return response.data
+
+
+def get(url, proxy=None, headers=None):
+    return request('GET', url, proxy=proxy, headers=headers)
+
+
+def post_json(url, payload, proxy=None):
+    """POST a JSON payload and return the decoded JSON response."""
+    data = request(
+        'POST', url, proxy=proxy,
+        headers={'Content-Type': 'application/json'},
+        body=json.dumps(payload).encode('utf-8')
+    )
+    return json.loads(data)
@@ -0,0 +1,224 @@
+# Background summarization jobs
+import os
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """Persistent job queue in SQLite with a bounded pool of worker threads.
+
+    Jobs survive restarts: anything still queued is picked up by the next
+    process that starts workers, and jobs left 'running' by a process that
+    died are re-queued once they have not been touched for ``stale_after``
+    seconds. Running jobs are touched every ``heartbeat_interval`` seconds
+    (default: a quarter of ``stale_after``), so long ones aren't mistaken for
+    orphans. A job orphaned ``max_attempts`` times (e.g. a video that keeps
+    crashing its worker) is failed instead of re-queued. Every gunicorn
+    worker can run its own pool against the same file.
+    """
+
+    def __init__(self, path, handler, workers=2, poll_interval=1.0,
+                 stale_after=600, keep_finished=24 * 3600, heartbeat_interval=None, max_attempts=3):
+        self.path = path
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.keep_finished = keep_finished
+        self.heartbeat_interval = heartbeat_interval or stale_after / 4
+        self.max_attempts = max_attempts
+        self._running = set()  # IDs of the jobs this process is running
+        self._running_lock = threading.Lock()
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._started_pid = None
+        self._start_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connect().execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        columns = [row[1] for row in self._connect().execute("PRAGMA table_info(jobs)")]
+        if 'attempts' not in columns:  # Database from before attempts were counted
+            self._connect().execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        self._connect().execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def start(self):
+        """Start the worker threads for this process (safe to call repeatedly)."""
+        with self._start_lock:
+            if self._started_pid == os.getpid() or self.workers <= 0:
+                return
+            self._started_pid = os.getpid()
+            for i in range(self.workers):
+                threading.Thread(target=self._run, name=f"summarize-job-{i}", daemon=True).start()
+            threading.Thread(target=self._heartbeat, name="summarize-job-heartbeat", daemon=True).start()
+
+    def submit(self, video_id):
+        """Queue a job for ``video_id`` and return its ID.
+
+        If the same video is already queued or running, that job's ID is
+        returned instead of queueing duplicate work.
+        """
+        conn = self._connect()
+        # Check and insert in one write transaction, so concurrent submits
+        # (other threads or workers) can't both queue the video
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE video_id = ? AND status IN ('queued', 'running') "
+                "ORDER BY created_at LIMIT 1",
+                (video_id,)
+            ).fetchone()
+            if row:
+                conn.execute("COMMIT")
+                return row[0]
+
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            conn.execute(
+                "INSERT INTO jobs (id, video_id, status, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, video_id, now, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """Return the job as a dict, or None if the ID is unknown."""
+        row = self._connect().execute(
+            "SELECT id, video_id, status, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            'job_id': row[0],
+            'video_id': row[1],
+            'status': row[2],
+            'created_at': row[5],
+            'updated_at': row[6],
+        }
+        if row[3] is not None:
+            job['summary'] = json.loads(row[3])
+        if row[4] is not None:
+            job['error'] = row[4]
+        return job
+
+    def _claim(self):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Recover jobs orphaned by a worker that died mid-run, unless
+            # they already took down max_attempts workers
+            conn.execute(
+                "UPDATE jobs SET status = 'error', error = ?, updated_at = ? "
+                "WHERE status = 'running' AND updated_at < ? AND attempts >= ?",
+                (f"Gave up after {self.max_attempts} attempts", now, now - self.stale_after, self.max_attempts)
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running' AND updated_at < ?",
+                (now, now - self.stale_after)
+            )
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'error') AND updated_at < ?",
+                (now - self.keep_finished,)
+            )
+            row = conn.execute(
+                "SELECT id, video_id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                             (now, row[0]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def _finish(self, job_id, result=None, error=None):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+            ('error' if error is not None else 'done',
+             json.dumps(result) if result is not None else None,
+             error, time.time(), job_id)
+        )
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            with self._running_lock:
+                job_ids = list(self._running)
+            if not job_ids:
+                continue
+            try:
+                self._connect().execute(
+                    f"UPDATE jobs SET updated_at = ? WHERE status = 'running' "
+                    f"AND id IN ({', '.join('?' * len(job_ids))})",
+                    (time.time(), *job_ids)
+                )
+            except sqlite3.Error:
+                logger.exception("Job heartbeat failed")
+
+    def _run(self):
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.Error:
+                logger.exception("Claiming a job failed")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            job_id, video_id = job
+            logger.info("Job %s: summarizing %s", job_id, video_id)
+            with self._running_lock:
+                self._running.add(job_id)
+            try:
+                result, error = self.handler(video_id), None
+            except Exception as e:
+                logger.warning("Job %s failed: %s", job_id, e)
+                result, error = None, str(e)
+            finally:
+                with self._running_lock:
+                    self._running.discard(job_id)
+
+            try:
+                self._finish(job_id, result=result, error=error)
+            except Exception:
+                # Left 'running'; without heartbeats it is re-queued once stale
+                logger.exception("Finishing job %s failed", job_id)
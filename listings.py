@@ -0,0 +1,188 @@
+# YouTube Data API listings (mostPopular chart and search)
+import os
+import logging
+import threading
+import unicodedata
+from memory_cache import TTLCache
+from cache import shared_cache
+
+logger = logging.getLogger(__name__)
+
+# Get YouTube API key
+YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
+
+# httplib2 (under googleapiclient) isn't thread-safe, so every thread gets its
+# own service object and Http; gthread workers can then call the API
+# concurrently. Built on first use: importing googleapiclient costs ~150ms
+# per worker boot. static_discovery uses the discovery document bundled with
+# the library, so no request is made to the discovery service
+_local = threading.local()
+
+
+def get_youtube():
+    youtube = getattr(_local, 'youtube', None)
+    if youtube is None or _local.pid != os.getpid():
+        import httplib2
+        from googleapiclient.discovery import build
+        youtube = _local.youtube = build(
+            'youtube', 'v3',
+            developerKey=YOUTUBE_API_KEY,
+            http=httplib2.Http(timeout=30),
+            static_discovery=True
+        )
+        _local.pid = os.getpid()
+    return youtube
+
+
+PAGE_SIZE = 50
+REGION = 'US'
+
+# Partial responses: only the fields the frontend actually renders
+CHART_FIELDS = ('nextPageToken,prevPageToken,pageInfo(totalResults,resultsPerPage),'
+                'items(id,snippet(title,channelTitle,publishedAt,thumbnails/high/url),statistics/viewCount)')
+SEARCH_FIELDS = ('nextPageToken,prevPageToken,pageInfo(totalResults,resultsPerPage),'
+                 'items(id/videoId,snippet(title,channelTitle,publishedAt,thumbnails/high/url))')
+STATS_FIELDS = 'items(id,statistics/viewCount)'
+
+# mostPopular chart is the same for every visitor: cache it per region and page
+# token, serve stale copies while one background refresh updates them
+CHART_CACHE_TTL = int(os.environ.get('CHART_CACHE_TTL', 300))
+CHART_CACHE_STALE = int(os.environ.get('CHART_CACHE_STALE', 3600))
+
+chart_cache = TTLCache(ttl=CHART_CACHE_TTL, stale_ttl=CHART_CACHE_STALE, max_entries=256,
+                       shared=shared_cache('chart', max_bytes=64 * 1024 * 1024))
+
+# Search results: search().list costs 100 quota units, so identical queries
+# (after normalization) and pages are answered from memory for a while
+SEARCH_CACHE_TTL = int(os.environ.get('SEARCH_CACHE_TTL', 900))
+SEARCH_CACHE_MAX_MB = int(os.environ.get('SEARCH_CACHE_MAX_MB', 32))
+
+search_cache = TTLCache(
+    ttl=SEARCH_CACHE_TTL,
+    max_entries=10000,
+    max_bytes=SEARCH_CACHE_MAX_MB * 1024 * 1024,
+    shared=shared_cache('search', max_bytes=4 * SEARCH_CACHE_MAX_MB * 1024 * 1024)
+)
+
+# View counts per video ID; only IDs missing here go to videos().list
+STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 600))
+
+stats_cache = TTLCache(ttl=STATS_CACHE_TTL, max_entries=50000,
+                       shared=shared_cache('stats', max_bytes=64 * 1024 * 1024))
+
+
+def normalize_query(query):
+    """Case, whitespace and unicode-insensitive form of a search query."""
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split())
+
+
+def item_video_id(item):
+    return item['id']['videoId'] if isinstance(item['id'], dict) and 'videoId' in item['id'] else item['id']
+
+
+def fetch_chart(page_token=None, region=REGION):
+    """Raw videos().list(chart='mostPopular') response, cached."""
+    def load():
+        response = get_youtube().videos().list(
+            part='snippet,statistics',
+            chart='mostPopular',
+            maxResults=PAGE_SIZE,
+            pageToken=page_token,
+            regionCode=region,
+            fields=CHART_FIELDS
+        ).execute()
+        # Chart items carry statistics already; remember them for search pages.
+        # Only on a real fetch, so cache hits don't rewrite (older) view counts
+        stats_cache.set_many({
+            item['id']: item['statistics'] for item in response.get('items', [])
+            if isinstance(item.get('id'), str) and 'statistics' in item
+        })
+        return response
+
+    return chart_cache.get_or_load((region, page_token), load)
+
+
+def fetch_search(query, page_token=None, region=REGION):
+    """Raw search().list response for a normalized query, cached."""
+    query = normalize_query(query)
+
+    def load():
+        return get_youtube().search().list(
+            part='snippet',
+            q=query,
+            relevanceLanguage='en',
+            maxResults=PAGE_SIZE,
+            pageToken=page_token,
+            type='video',
+            # videoCaption='closedCaption',
+            regionCode=region,
+            fields=SEARCH_FIELDS
+        ).execute()
+
+    return search_cache.get_or_load((query, page_token, region), load)
+
+
+def get_statistics(video_ids):
+    """Statistics per video ID, asking the API only for IDs not cached."""
+    stats = stats_cache.get_many(video_ids)
+    missing = [video_id for video_id in video_ids if video_id not in stats]
+
+    if not missing:
+        return stats
+
+    # Fetch statistics for all missing videos in one API call
+    try:
+        stats_data = get_youtube().videos().list(
+            part='statistics',
+            id=','.join(missing),
+            fields=STATS_FIELDS
+        ).execute()
+
+        fetched = {video['id']: video.get('statistics', {}) for video in stats_data.get('items', [])}
+        stats_cache.set_many(fetched)
+        stats.update(fetched)
+    except Exception as e:
+        logger.warning("Error fetching video statistics: %s", e)
+
+    return stats
+
+
+def list_videos(query=None, page_token=None, region=REGION):
+    """Single listing pipeline for the chart (no query) and search results.
+
+    Returns the page sent to the frontend and the raw API response (for its
+    page tokens).
+    """
+    if query:
+        response = fetch_search(query, page_token, region)
+    else:
+        response = fetch_chart(page_token, region)
+
+    items = []
+    for item in response.get('items', []):
+        video_id = item_video_id(item)
+        if video_id:  # Skip entries without a valid video ID
+            items.append((video_id, item))
+
+    stats = get_statistics([video_id for video_id, item in items if 'statistics' not in item])
+
+    videos = []
+    for video_id, item in items:
+        view_count = item.get('statistics', stats.get(video_id, {})).get('viewCount', '0')
+        snippet = item['snippet']
+        videos.append({
+            'title': snippet['title'],
+            'thumbnail': snippet['thumbnails']['high']['url'],
+            'video_id': video_id,
+            'channel': snippet['channelTitle'],
+            'postDate': snippet['publishedAt'],
+            'views': int(view_count) if view_count.isdigit() else 0
+        })
+
+    # Safe division - handle edge cases
+    page_info = response.get('pageInfo', {})
+    results_per_page = page_info.get('resultsPerPage', 1)
+    total_results = page_info.get('totalResults', 0)
+    total_pages = total_results // results_per_page if results_per_page > 0 else 0
+
+    return {'total_pages': total_pages, 'data': videos}, response
@@ -1,23 +1,46 @@
 import os
 import sys
+import logging
 
 try:
-    from flask import Flask, request, jsonify, render_template, session
+    from flask import Flask, request, jsonify, render_template, make_response, Response, stream_with_context
+    from itsdangerous import URLSafeSerializer, BadSignature
     from flask_limiter import Limiter
     from flask_limiter.util import get_remote_address
-    from googleapiclient.discovery import build
-    from summarize import summarize_transcript
+    from listings import list_videos, normalize_query
+    from summarize import cached_summarize_transcript, stream_summarize_transcript, summary_cache, summary_key, video_summary_key, SUMMARY_FINGERPRINT
+    from cache import CACHE_DIR, shared_cache
+    from memory_cache import TTLCache
+    from rate_limit_storage import limiter_storage_uri
+    from circuit_breaker import CircuitBreaker
+    from singleflight import SingleFlight
+    from jobs import JobQueue
+    from captions import discover_caption_url, select_subtitle_url
+    from subtitle_parser import parse_subtitles
+    from transcript_compression import collapse_repeats
     from youtube_transcript_api import YouTubeTranscriptApi
     from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound, TranscriptsDisabled, NoTranscriptFound, VideoUnavailable
-    import yt_dlp
+    import re
     import time
-    import urllib.request
+    import threading
+    from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+    import http_client
     import json
-    import re
+    import urllib.parse
+    import metrics
+    import http_caching
+    from http_caching import cacheable
+    from listings import chart_cache, search_cache, stats_cache
 except ImportError as e:
     print(f"Import error: {e}", file=sys.stderr)
     raise
 
+logging.basicConfig(
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 
 # Initialize rate limiter
@@ -25,76 +48,253 @@ limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=["200 per day", "50 per hour"],  # Global limits
-    storage_uri="memory://",  # Use memory storage (simple, works on Render)
+    storage_uri=limiter_storage_uri(),  # Counters shared by all workers
 )
 
+# One summary budget per client across /summarize, /summarize/stream,
+# /summarize/jobs and /summarize/batch (charged per video, see batch_cost)
+SUMMARY_RATE_LIMIT = os.environ.get('SUMMARY_RATE_LIMIT', '10 per hour')
+summary_limit = limiter.shared_limit(lambda: SUMMARY_RATE_LIMIT, scope='summarize')
+
 # Get secret key
 app.secret_key = os.environ.get('SECRET_KEY', 'supersecretkey')
 
-# Get YouTube API key
-YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
+@app.before_request
+def start_timer():
+    request.environ['tubenotes.start'] = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    start = request.environ.get('tubenotes.start')
+    if start is not None:
+        # Streaming endpoints: time until the headers, not the whole stream
+        endpoint = request.endpoint or 'unmatched'
+        metrics.observe('request_seconds', time.perf_counter() - start, endpoint=endpoint, method=request.method)
+        metrics.inc('requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
+
+@app.after_request
+def http_cache_headers(response):
+    # Registered after record_request so it runs first: metrics see the 304s
+    return http_caching.finalize(response, app.static_folder)
+
+
+@app.url_defaults
+def static_url_version(endpoint, values):
+    # url_for('static', ...) -> /static/js/script.js?v=<content hash>
+    if endpoint == 'static' and 'filename' in values:
+        version = http_caching.static_version(app.static_folder, values['filename'])
+        if version:
+            values.setdefault('v', version)
+
+
+# Cache-Control max-age for listing JSON (the chart is refreshed every few minutes)
+LISTING_MAX_AGE = int(os.environ.get('LISTING_MAX_AGE', 60))
+SUMMARY_MAX_AGE = int(os.environ.get('SUMMARY_MAX_AGE', 3600))
+
+
+@app.route('/metrics')
+@limiter.exempt
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
-youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
 
 @app.route('/')
 def home():
-    return render_template('index.html')
+    # Revalidated on every visit: it links the current static asset versions
+    return cacheable(make_response(render_template('index.html', summary_version=SUMMARY_FINGERPRINT)), max_age=0)
 
 
 @app.route('/privacy-policy')
 def privacy_policy():
-    return render_template('privacy-policy.html')
+    return cacheable(make_response(render_template('privacy-policy.html')), max_age=0)
 
 
 @app.route('/terms-of-service')
 def terms_of_service():
-    return render_template('terms-of-service.html')
+    return cacheable(make_response(render_template('terms-of-service.html')), max_age=0)
 
 
 @app.route('/videos')
 def videos():    
     videos = default_videos()
-    return jsonify(videos)
+    return cacheable(jsonify(videos), LISTING_MAX_AGE)
 
 
 @app.route('/summarize')
-@limiter.limit("10 per hour")
+@summary_limit
 def summarize():
     video_id = request.args.get('videoId')
     
-    print(f"=== SUMMARIZE REQUEST ===")
-    print(f"Video ID: {video_id}")
-    
+    logger.info("Summarize request: %s", video_id)
+
     if not video_id:
         return jsonify({'error': 'No video ID provided'}), 400
     
     try:
-        print(f"Step 1: Fetching transcript...")
-        transcript = fetch_transcript(video_id)
-        print(f"Step 1 SUCCESS: {len(transcript)} chars")
-        
-        print(f"Step 2: Generating summary...")
-        summary = summarize_transcript(transcript)
-        
-        # DEBUG: Log what we're returning
-        print("=" * 60)
-        print("SUMMARY DATA:")
-        print(type(summary))
-        print(summary)
-        print("=" * 60)
-        
-        print(f"Step 2 SUCCESS")
-        
-        return jsonify({'summary': summary})
-        
+        # Step 0: A cached summary for this video skips fetch and LLM entirely
+        summary = summary_cache.get(video_summary_key(video_id))
+        if summary is not None:
+            logger.info("Summary cache hit: %s", video_id)
+            return cacheable(jsonify({'summary': summary}), SUMMARY_MAX_AGE)
+
+        # Concurrent requests for the same video share one pipeline run
+        summary = summary_flight.do(video_id, lambda: summarize_video(video_id))
+        logger.debug("Summary for %s: %d sections", video_id, len((summary or {}).get('sections', [])))
+        if summary is None:
+            return jsonify({'summary': summary})
+        return cacheable(jsonify({'summary': summary}), SUMMARY_MAX_AGE)
+
     except Exception as e:
-        import traceback
-        print("=" * 60)
-        print("ERROR:")
-        print(traceback.format_exc())
-        print("=" * 60)
-        
+        logger.exception("Summarize failed for %s", video_id)
         return jsonify({'error': str(e)}), 500
+
+
+@app.route('/summarize/jobs', methods=['POST'])
+@summary_limit
+def create_summarize_job():
+    """Queue a summary and return immediately; poll GET /summarize/jobs/<id>."""
+    data = request.get_json(silent=True) or {}
+    video_id = data.get('videoId') or request.args.get('videoId')
+
+    if not video_id:
+        return jsonify({'error': 'No video ID provided'}), 400
+
+    job_queue.start()
+    job_id = job_queue.submit(video_id)
+    return jsonify({'job_id': job_id, 'status': job_queue.get(job_id)['status']}), 202
+
+
+@app.route('/summarize/jobs/<job_id>')
+@limiter.limit("120 per minute")
+def get_summarize_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    # Pollers get a 304 until the job's state changes
+    return cacheable(jsonify(job), max_age=0, public=False)
+
+
+def batch_cost():
+    """Rate limit cost of a batch: one per distinct video ID.
+
+    Invalid and oversized batches cost 1, the view rejects them with a 400.
+    """
+    video_ids = (request.get_json(silent=True) or {}).get('videoIds')
+    if not isinstance(video_ids, list) or not all(isinstance(v, str) and v for v in video_ids):
+        return 1
+    count = len(set(video_ids))
+    return count if 0 < count <= BATCH_MAX_VIDEOS else 1
+
+
+@app.route('/summarize/batch', methods=['POST'])
+@limiter.shared_limit(lambda: SUMMARY_RATE_LIMIT, scope='summarize', cost=batch_cost)
+def summarize_batch():
+    """Summaries for a list of videos, streamed as NDJSON in completion order.
+
+    Body: {"videoIds": [...]}. Each line is {"videoId", "summary", "cached"}
+    or {"videoId", "error"}; cached summaries come first.
+    """
+    data = request.get_json(silent=True) or {}
+    video_ids = data.get('videoIds')
+
+    if not isinstance(video_ids, list) or not video_ids or not all(isinstance(v, str) and v for v in video_ids):
+        return jsonify({'error': 'videoIds must be a non-empty list of video IDs'}), 400
+    video_ids = list(dict.fromkeys(video_ids))  # Drop duplicates, keep order
+    if len(video_ids) > BATCH_MAX_VIDEOS:
+        return jsonify({'error': f'At most {BATCH_MAX_VIDEOS} videos per batch'}), 400
+
+    def generate():
+        cached = summary_cache.get_many([video_summary_key(video_id) for video_id in video_ids])
+        pending = []
+        for video_id in video_ids:
+            summary = cached.get(video_summary_key(video_id))
+            if summary is not None:
+                yield json.dumps({'videoId': video_id, 'summary': summary, 'cached': True}) + '\n'
+            else:
+                pending.append(video_id)
+
+        futures = {batch_pool.submit(run_summarize_job, video_id): video_id for video_id in pending}
+        try:
+            for future in as_completed(futures):
+                video_id = futures[future]
+                try:
+                    line = {'videoId': video_id, 'summary': future.result(), 'cached': False}
+                except Exception as e:
+                    line = {'videoId': video_id, 'error': str(e)}
+                yield json.dumps(line) + '\n'
+        finally:
+            # Client went away: don't start the videos still queued
+            for future in futures:
+                future.cancel()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/summarize/stream')
+@summary_limit
+def summarize_stream():
+    """Same as /summarize, but pushes each section over SSE as soon as it exists."""
+    video_id = request.args.get('videoId')
+
+    if not video_id:
+        return jsonify({'error': 'No video ID provided'}), 400
+
+    def generate():
+        try:
+            summary = summary_cache.get(video_summary_key(video_id))
+            if summary is None:
+                with summary_flight.hold(video_id) as waited:
+                    # Someone else just summarized this video: replay their result
+                    if waited:
+                        summary = summary_cache.get(video_summary_key(video_id))
+
+                    if summary is None:
+                        transcript = get_transcript(video_id)
+                        summary = summary_cache.get(summary_key(transcript))
+                        if summary is not None:
+                            # Same transcript as another video: skip the fetch next time
+                            summary_cache.set(video_summary_key(video_id), summary)
+
+                    if summary is None:
+                        sections = []
+                        for section in stream_summarize_transcript(transcript):
+                            sections.append(section)
+                            yield sse_event('section', section)
+
+                        summary = {'sections': sections}
+                        if sections:
+                            summary_cache.set(summary_key(transcript), summary)
+                            summary_cache.set(video_summary_key(video_id), summary)
+
+                        yield sse_event('done', {'summary': summary})
+                        return
+
+            # Cache hit: everything is ready, send it all at once
+            for section in summary.get('sections', []):
+                yield sse_event('section', section)
+            yield sse_event('done', {'summary': summary})
+
+        except Exception as e:
+            logger.exception("Summary stream failed for %s", video_id)
+            yield sse_event('error', {'error': str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
     
 
 # Protect search endpoint
@@ -112,9 +312,9 @@ def search():
     
     try:
         videos = search_videos(query.strip())
-        return jsonify(videos)
+        return cacheable(jsonify(videos), LISTING_MAX_AGE)
     except Exception as e:
-        print(f"Search error: {e}")
+        logger.warning("Search error: %s", e)
         return jsonify({
             'error': str(e),
             'total_pages': 0,
@@ -126,10 +326,11 @@ def search():
 @app.route('/next')
 @limiter.limit("60 per minute")
 def next():
-    query = request.args.get('query')
     try:
-        videos = next_page(query)
-        return jsonify(videos)
+        videos = next_page(request.args.get('cursor'))
+        return cacheable(jsonify(videos), LISTING_MAX_AGE)
+    except BadSignature:
+        return jsonify({'error': 'Invalid or missing cursor', 'data': []}), 400
     except Exception as e:
         return jsonify({'error': str(e), 'data': []}), 500
     
@@ -137,10 +338,11 @@ def next():
 @app.route('/prev')
 @limiter.limit("60 per minute")
 def prev():
-    query = request.args.get('query')
     try:
-        videos = prev_page(query)
-        return jsonify(videos)
+        videos = prev_page(request.args.get('cursor'))
+        return cacheable(jsonify(videos), LISTING_MAX_AGE)
+    except BadSignature:
+        return jsonify({'error': 'Invalid or missing cursor', 'data': []}), 400
     except Exception as e:
         return jsonify({'error': str(e), 'data': []}), 500
     
@@ -155,253 +357,48 @@ def ratelimit_handler(e):
     }), 429
 
 
-def default_videos():
-    request = youtube.videos().list(
-        part='snippet, statistics',
-        chart='mostPopular',
-        maxResults=50,
-        regionCode='US'
-    )
-    response = request.execute()
+# Pagination cursors: the query and YouTube page token, signed with the app
+# secret. Each page is a pure function of its URL (no session state), so
+# tabs don't clobber each other and responses can be shared by caches
+cursor_serializer = URLSafeSerializer(app.secret_key, salt='page-cursor')
 
-    set_page_tokens(response)
 
-    videos = []
-    for item in response['items']:
-        video_id = item['id']['videoId'] if isinstance(item['id'], dict) and 'videoId' in item['id'] else item['id']
-        if not video_id:
-            continue  # Skip entries without a valid video ID
+def make_cursor(query, page_token):
+    if not page_token:
+        return None
+    return cursor_serializer.dumps({'q': normalize_query(query) if query else '', 't': page_token})
 
-        video_data = {
-            'title': item['snippet']['title'],
-            'thumbnail': item['snippet']['thumbnails']['high']['url'],
-            'video_id': video_id,
-            'channel': item['snippet']['channelTitle'],
-            'views': item['statistics'].get('viewCount', '0'),
-            'postDate': item['snippet']['publishedAt']
-        }
-        videos.append(video_data)
 
+def read_cursor(cursor):
+    """Return (query, page_token); raises BadSignature if tampered or missing."""
+    if not cursor:
+        raise BadSignature('Missing cursor')
+    data = cursor_serializer.loads(cursor)
+    return data.get('q') or None, data['t']
 
-    total_pages = response['pageInfo']['totalResults'] // response['pageInfo']['resultsPerPage']
-    
-    return {'total_pages': total_pages, 'data': videos}
+
+def default_videos():
+    return videos_page()
 
 
 def search_videos(query):
-    request = youtube.search().list(
-        part='snippet',
-        q=query,
-        relevanceLanguage='en',
-        maxResults=50,
-        type='video',
-        # videoCaption='closedCaption',
-        regionCode='US'
-    )
-    
-    response = request.execute()
+    return videos_page(query)
 
-    set_page_tokens(response)
 
-    videos = []
-    video_ids = []
-    
-    # First, collect all video IDs
-    for item in response['items']:
-        video_id = item['id']['videoId'] if isinstance(item['id'], dict) and 'videoId' in item['id'] else item['id']
-        if video_id:
-            video_ids.append(video_id)
-    
-    # Fetch statistics (views, likes, etc.) for all videos in one API call
-    stats_response = {}
-    if video_ids:
-        try:
-            stats_request = youtube.videos().list(
-                part='statistics',
-                id=','.join(video_ids)
-            )
-            stats_data = stats_request.execute()
-            
-            # Create a dictionary mapping video_id to statistics
-            for video in stats_data.get('items', []):
-                stats_response[video['id']] = video.get('statistics', {})
-        except Exception as e:
-            print(f"Error fetching video statistics: {e}")
-    
-    # Now build the video data with statistics
-    for item in response['items']:
-        video_id = item['id']['videoId'] if isinstance(item['id'], dict) and 'videoId' in item['id'] else item['id']
-        if not video_id:
-            continue  # Skip entries without a valid video ID
-
-        # Get statistics for this video
-        stats = stats_response.get(video_id, {})
-        view_count = stats.get('viewCount', '0')
-        
-        video_data = {
-            'title': item['snippet']['title'],
-            'thumbnail': item['snippet']['thumbnails']['high']['url'],
-            'video_id': video_id,
-            'channel': item['snippet']['channelTitle'],
-            'postDate': item['snippet']['publishedAt'],
-            'views': int(view_count) if view_count.isdigit() else 0
-        }
-        videos.append(video_data)
-
-    # Safe division - handle edge cases
-    results_per_page = response['pageInfo'].get('resultsPerPage', 1)
-    total_results = response['pageInfo'].get('totalResults', 0)
-    
-    total_pages = total_results // results_per_page if results_per_page > 0 else 0
-
-    return {'total_pages': total_pages, 'data': videos}
-
-
-def next_page(query=None):
-    if query:
-        request = youtube.search().list(
-            part='snippet',
-            q=query,
-            relevanceLanguage='en',
-            maxResults=50,
-            pageToken=session.get('next_page_token'),  # FROM SESSION
-            type='video',
-            regionCode='US'
-        )
-    else:
-        request = youtube.videos().list(
-            part='snippet,statistics',
-            chart='mostPopular',
-            maxResults=50,
-            pageToken=session.get('next_page_token'),  # FROM SESSION
-            regionCode='US'
-        )
-
-    response = request.execute()
-    set_page_tokens(response)  # SAVE TO SESSION
-    
-    videos = []
-    video_ids = []
-    
-    for item in response['items']:
-        video_id = item['id']['videoId'] if isinstance(item['id'], dict) and 'videoId' in item['id'] else item['id']
-        if video_id:
-            video_ids.append(video_id)
-    
-    # Fetch statistics
-    stats_response = {}
-    if video_ids:
-        try:
-            stats_request = youtube.videos().list(
-                part='statistics',
-                id=','.join(video_ids)
-            )
-            stats_data = stats_request.execute()
-            
-            for video in stats_data.get('items', []):
-                stats_response[video['id']] = video.get('statistics', {})
-        except Exception as e:
-            print(f"Error fetching statistics: {e}")
-    
-    for item in response['items']:
-        video_id = item['id']['videoId'] if isinstance(item['id'], dict) and 'videoId' in item['id'] else item['id']
-        if not video_id:
-            continue
+def next_page(cursor):
+    return videos_page(*read_cursor(cursor))
 
-        stats = stats_response.get(video_id, {})
-        view_count = stats.get('viewCount', '0')
-
-        video_data = {
-            'title': item['snippet']['title'],
-            'thumbnail': item['snippet']['thumbnails']['high']['url'],
-            'video_id': video_id,
-            'channel': item['snippet']['channelTitle'],
-            'postDate': item['snippet']['publishedAt'],
-            'views': int(view_count) if view_count.isdigit() else 0
-        }
-        videos.append(video_data)
-
-    results_per_page = response['pageInfo'].get('resultsPerPage', 1)
-    total_results = response['pageInfo'].get('totalResults', 0)
-    total_pages = total_results // results_per_page if results_per_page > 0 else 0
-    
-    return {'total_pages': total_pages, 'data': videos}
-
-
-def prev_page(query=None):
-    if query:
-        request = youtube.search().list(
-            part='snippet',
-            q=query,
-            relevanceLanguage='en',
-            maxResults=50,
-            pageToken=session.get('prev_page_token'),  # FROM SESSION
-            type='video',
-            regionCode='US'
-        )
-    else:
-        request = youtube.videos().list(
-            part='snippet,statistics',
-            chart='mostPopular',
-            maxResults=50,
-            pageToken=session.get('prev_page_token'),  # FROM SESSION
-            regionCode='US'
-        )
-
-    response = request.execute()
-    set_page_tokens(response)  # SAVE TO SESSION
-    
-    videos = []
-    video_ids = []
-    
-    for item in response['items']:
-        video_id = item['id']['videoId'] if isinstance(item['id'], dict) and 'videoId' in item['id'] else item['id']
-        if video_id:
-            video_ids.append(video_id)
-    
-    stats_response = {}
-    if video_ids:
-        try:
-            stats_request = youtube.videos().list(
-                part='statistics',
-                id=','.join(video_ids)
-            )
-            stats_data = stats_request.execute()
-            
-            for video in stats_data.get('items', []):
-                stats_response[video['id']] = video.get('statistics', {})
-        except Exception as e:
-            print(f"Error fetching statistics: {e}")
-    
-    for item in response['items']:
-        video_id = item['id']['videoId'] if isinstance(item['id'], dict) and 'videoId' in item['id'] else item['id']
-        if not video_id:
-            continue
 
-        stats = stats_response.get(video_id, {})
-        view_count = stats.get('viewCount', '0')
-
-        video_data = {
-            'title': item['snippet']['title'],
-            'thumbnail': item['snippet']['thumbnails']['high']['url'],
-            'video_id': video_id,
-            'channel': item['snippet']['channelTitle'],
-            'postDate': item['snippet']['publishedAt'],
-            'views': int(view_count) if view_count.isdigit() else 0
-        }
-        videos.append(video_data)
-
-    results_per_page = response['pageInfo'].get('resultsPerPage', 1)
-    total_results = response['pageInfo'].get('totalResults', 0)
-    total_pages = total_results // results_per_page if results_per_page > 0 else 0
-    
-    return {'total_pages': total_pages, 'data': videos}
+def prev_page(cursor):
+    return videos_page(*read_cursor(cursor))
 
 
-def set_page_tokens(response):
-    """Store tokens in session"""
-    session['next_page_token'] = response.get('nextPageToken')
-    session['prev_page_token'] = response.get('prevPageToken')
+def videos_page(query=None, page_token=None):
+    """A listing page plus signed cursors for its neighbours."""
+    page, response = list_videos(query, page_token)
+    page['next_cursor'] = make_cursor(query, response.get('nextPageToken'))
+    page['prev_cursor'] = make_cursor(query, response.get('prevPageToken'))
+    return page
 
 
 # Store credentials only
@@ -413,174 +410,472 @@ DECODO_PORT = os.environ.get('DECODO_PORT', '10001')
 # Build proxy URL (GLOBAL)
 if DECODO_USERNAME and DECODO_PASSWORD:
     proxy_url = f"http://{DECODO_USERNAME}:{DECODO_PASSWORD}@{DECODO_HOST}:{DECODO_PORT}"
-    print(f"✓ Proxy configured: {proxy_url[:30]}...")
+    logger.info("Proxy configured: %s:%s", DECODO_HOST, DECODO_PORT)
 else:
     proxy_url = None
-    print("⚠ No proxy configured")
+    logger.warning("No proxy configured")
 
 
-def fetch_transcript(video_id, proxy=None):
+# Transcript cache (SQLite on disk, shared by all workers)
+TRANSCRIPT_LANG = 'en'
+TRANSCRIPT_CACHE_TTL = int(os.environ.get('TRANSCRIPT_CACHE_TTL', 7 * 24 * 3600))
+TRANSCRIPT_NEGATIVE_TTL = int(os.environ.get('TRANSCRIPT_NEGATIVE_TTL', 3600))
+TRANSCRIPT_CACHE_MAX_MB = int(os.environ.get('TRANSCRIPT_CACHE_MAX_MB', 256))
+
+transcript_cache = TTLCache(
+    ttl=TRANSCRIPT_CACHE_TTL,
+    max_entries=256,
+    max_bytes=32 * 1024 * 1024,
+    shared=shared_cache('transcripts', max_bytes=TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024)
+)
+
+
+for name, cache in (('chart', chart_cache), ('search', search_cache), ('stats', stats_cache),
+                    ('summary', summary_cache), ('transcript', transcript_cache)):
+    metrics.register_cache(name, cache)
+
+
+# Coalesces concurrent summarize requests for the same video (threads + workers)
+summary_flight = SingleFlight(os.path.join(CACHE_DIR, 'locks'))
+metrics.register_singleflight('summary', summary_flight)
+
+
+class TranscriptUnavailable(Exception):
+    """The video has no usable captions (or is private/removed)."""
+
+
+class NoCaptionsError(Exception):
+    """yt-dlp saw the video and it has no English captions."""
+
+
+class PrivateVideoError(Exception):
+    """yt-dlp reported the video as private."""
+
+
+def get_transcript(video_id, lang=TRANSCRIPT_LANG):
+    """Cached front for fetch_transcript.
+
+    Successful transcripts are kept for TRANSCRIPT_CACHE_TTL seconds.
+    "No captions" results are cached for TRANSCRIPT_NEGATIVE_TTL so repeat
+    requests for those videos fail fast without touching YouTube.
+    """
+    key = f"{video_id}:{lang}"
+
+    cached = transcript_cache.get(key)
+    if cached is not None:
+        if 'error' in cached:
+            logger.info("Transcript cache hit (negative): %s", video_id)
+            raise TranscriptUnavailable(cached['error'])
+        logger.info("Transcript cache hit: %s", video_id)
+        return cached['text']
+
+    try:
+        transcript = fetch_transcript(video_id)
+    except TranscriptUnavailable as e:
+        transcript_cache.set(key, {'error': str(e)}, ttl=TRANSCRIPT_NEGATIVE_TTL)
+        raise
+
+    transcript_cache.set(key, {'text': transcript})
+    return transcript
+
+
+def summarize_video(video_id):
+    """Transcript + summary pipeline for one video, reusing both caches."""
+    # Re-check: a request in another worker may have finished it meanwhile
+    summary = summary_cache.get(video_summary_key(video_id))
+    if summary is not None:
+        logger.info("Summary cache hit: %s", video_id)
+        return summary
+
+    with metrics.span('transcript') as fields:
+        fields['video_id'] = video_id
+        transcript = get_transcript(video_id)
+        fields['chars'] = len(transcript)
+
+    with metrics.span('summary'):
+        summary = cached_summarize_transcript(transcript)
+    if summary is not None:
+        summary_cache.set(video_summary_key(video_id), summary)
+    return summary
+
+
+def run_summarize_job(video_id):
+    summary = summary_flight.do(video_id, lambda: summarize_video(video_id))
+    if summary is None:
+        raise Exception("Failed to generate summary")
+    return summary
+
+
+# Background job queue (SQLite, survives restarts) for POST /summarize/jobs.
+# Workers aren't started on import: gunicorn starts them in every worker
+# process (post_worker_init in gunicorn.conf.py), `python main.py` below, and
+# otherwise the first submitted job.
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+
+job_queue = JobQueue(
+    os.path.join(CACHE_DIR, 'jobs.db'),
+    handler=run_summarize_job,
+    workers=JOB_WORKERS
+)
+
+
+# POST /summarize/batch: at most BATCH_WORKERS videos per process run at once,
+# across all batches
+# (a full batch spends the whole default SUMMARY_RATE_LIMIT budget)
+BATCH_MAX_VIDEOS = int(os.environ.get('BATCH_MAX_VIDEOS', 10))
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 4))
+
+batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='summarize-batch')
+
+
+# Transcript fetching strategy:
+#   sequential - yt-dlp first, transcript API after TRANSCRIPT_FALLBACK_DELAY
+#   hedged     - start yt-dlp, start the transcript API too if yt-dlp fails or
+#                hasn't answered within TRANSCRIPT_HEDGE_DELAY; first valid wins
+TRANSCRIPT_FETCH_MODE = os.environ.get('TRANSCRIPT_FETCH_MODE', 'hedged')
+TRANSCRIPT_HEDGE_DELAY = float(os.environ.get('TRANSCRIPT_HEDGE_DELAY', 2.0))
+TRANSCRIPT_FALLBACK_DELAY = float(os.environ.get('TRANSCRIPT_FALLBACK_DELAY', 2.0))
+
+# 'player' finds caption URLs with one InnerTube request, falling back to the
+# full yt-dlp extract_info; 'ytdlp' always uses extract_info
+CAPTION_DISCOVERY = os.environ.get('CAPTION_DISCOVERY', 'player')
+
+# Pool for hedged fetches; losers finish in the background and are ignored.
+# A running loser can't be interrupted, so at most TRANSCRIPT_HEDGE_MAX_INFLIGHT
+# fetches may have a hedge out at once; past that, fetches just wait for their
+# first method instead of hedging.
+TRANSCRIPT_HEDGE_MAX_INFLIGHT = int(os.environ.get('TRANSCRIPT_HEDGE_MAX_INFLIGHT', 4))
+# Every thread that can fetch a transcript at once (request threads, batch and
+# job workers) gets a thread for its first method, plus one per hedge slot, so
+# nothing waits in the pool's queue behind other fetches
+TRANSCRIPT_FETCH_THREADS = int(os.environ.get(
+    'TRANSCRIPT_FETCH_THREADS',
+    int(os.environ.get('GUNICORN_THREADS', 16)) + BATCH_WORKERS + JOB_WORKERS + TRANSCRIPT_HEDGE_MAX_INFLIGHT
+))
+fetch_pool = ThreadPoolExecutor(max_workers=TRANSCRIPT_FETCH_THREADS, thread_name_prefix='transcript-fetch')
+hedge_slots = threading.BoundedSemaphore(TRANSCRIPT_HEDGE_MAX_INFLIGHT)
+
+# Per method (and proxy for yt-dlp) circuit breaker: methods that keep
+# failing, or hit a bot check, are skipped until a probe after the cooldown
+# succeeds, and the healthiest method is tried first. State is per worker.
+transcript_breaker = CircuitBreaker(
+    window=int(os.environ.get('TRANSCRIPT_BREAKER_WINDOW', 20)),
+    min_calls=int(os.environ.get('TRANSCRIPT_BREAKER_MIN_CALLS', 5)),
+    failure_rate=float(os.environ.get('TRANSCRIPT_BREAKER_FAILURE_RATE', 0.5)),
+    cooldown=float(os.environ.get('TRANSCRIPT_BREAKER_COOLDOWN', 30)),
+    max_cooldown=float(os.environ.get('TRANSCRIPT_BREAKER_MAX_COOLDOWN', 600)),
+)
+
+
+def breaker_key(method, proxy=None):
+    """Circuit name for a method through a proxy (host:port, no credentials)."""
+    if not proxy:
+        return method
+    parsed = urllib.parse.urlsplit(proxy)
+    return f"{method}@{parsed.hostname}:{parsed.port}" if parsed.hostname else method
+
+
+def fetch_transcript(video_id, proxy=None, info=None):
+    """Fetch the English transcript text for a video.
+
+    If ``info`` is a dict it is filled with the winning method, its latency
+    in seconds and the errors from methods that failed.
+    """
     if not isinstance(video_id, str) or not video_id.strip():
         raise ValueError("Invalid video ID")
 
     # Use passed proxy or fall back to global
     if proxy is None:
         proxy = proxy_url  # Use global if not passed
-    
-    errors = []
+
+    candidates = {
+        breaker_key('yt-dlp', proxy): ('yt-dlp', lambda: fetch_with_ytdlp(video_id, proxy)),
+        breaker_key('youtube-transcript-api'): ('youtube-transcript-api', lambda: fetch_with_transcript_api(video_id)),
+    }
+    allowed, skipped, probes = transcript_breaker.select(list(candidates))
+
+    # Skipped methods report their last error, so an all-open breaker still
+    # yields the right message (e.g. "YouTube is blocking requests")
+    errors = []  # (method, exception or message)
+    for key in skipped:
+        name = candidates[key][0]
+        errors.append((name, f"skipped, circuit open ({transcript_breaker.last_error(key)})"))
+        metrics.inc('transcript_fetch_total', method=name, outcome='skipped')
+
+    methods = [(candidates[key][0], timed_method(candidates[key][0], candidates[key][1], key, probes.get(key)))
+               for key in allowed]
+
+    start = time.monotonic()
+    if not methods:
+        method, transcript_text = None, None
+    elif TRANSCRIPT_FETCH_MODE == 'sequential':
+        method, transcript_text = _fetch_sequential(methods, errors)
+    else:
+        method, transcript_text = _fetch_hedged(methods, errors)
+    latency = time.monotonic() - start
+
+    if info is not None:
+        info.update({'method': method, 'latency': latency, 'errors': [f"{name}: {e}" for name, e in errors]})
+
+    if transcript_text:
+        metrics.observe('transcript_fetch_seconds', latency, method=method)
+        logger.info("Transcript for %s via %s in %.2fs (%s)", video_id, method, latency, TRANSCRIPT_FETCH_MODE)
+        return transcript_text
+
+    raise_fetch_error(errors)
+
+
+def timed_method(name, fetch, key=None, probe=None):
+    """Wrap a transcript method with a timing span, an outcome counter and
+    circuit breaker bookkeeping under ``key`` (``probe``: its probe token)."""
+    def run():
+        start = time.monotonic()
+        try:
+            with metrics.span('transcript_method', method=name):
+                result = fetch()
+        except Exception as e:
+            kind = classify_fetch_error(e)
+            if key is not None:
+                # Missing captions or a private video (typed results, see
+                # classify_fetch_error) say nothing about the method; 5xx, 429
+                # and anything unrecognised count against it
+                transcript_breaker.record(key, ok=kind in ('no_captions', 'unavailable'),
+                                          latency=time.monotonic() - start, error=str(e), trip=kind == 'blocked',
+                                          probe=probe)
+            metrics.inc('transcript_fetch_total', method=name, outcome='error')
+            raise
+        if key is not None:
+            transcript_breaker.record(key, ok=True, latency=time.monotonic() - start, probe=probe)
+        metrics.inc('transcript_fetch_total', method=name, outcome='ok')
+        return result
+    return run
+
+
+def _fetch_sequential(methods, errors):
+    for i, (name, fetch) in enumerate(methods):
+        if i > 0 and TRANSCRIPT_FALLBACK_DELAY:
+            with metrics.span('fallback_wait'):
+                time.sleep(TRANSCRIPT_FALLBACK_DELAY)  # Rate limiting
+        try:
+            return name, fetch()
+        except Exception as e:
+            errors.append((name, e))
+            logger.warning("%s failed: %s", name, e)
+    return None, None
+
+
+def _release_when_done(futures, semaphore):
+    """Release ``semaphore`` once every future has finished (or was cancelled)."""
+    left = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            left[0] -= 1
+            if left[0]:
+                return
+        semaphore.release()
+
+    for future in futures:
+        future.add_done_callback(done)
+
+
+def _fetch_hedged(methods, errors):
+    pending = {}
+    remaining = list(methods)
+    hedging = True
+
+    def launch():
+        name, fetch = remaining.pop(0)
+        pending[fetch_pool.submit(fetch)] = name
+
+    launch()
+    while pending:
+        # Only wait for the hedge delay while there is a backup left to start
+        timeout = TRANSCRIPT_HEDGE_DELAY if remaining and hedging else None
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        if not done:
+            if hedge_slots.acquire(blocking=False):
+                logger.info("No transcript after %ss, hedging with %s", TRANSCRIPT_HEDGE_DELAY, remaining[0][0])
+                launch()
+                _release_when_done(list(pending), hedge_slots)
+            else:
+                logger.info("Too many hedged fetches still running, not hedging")
+                hedging = False
+            continue
+
+        for future in done:
+            name = pending.pop(future)
+            try:
+                transcript_text = future.result()
+            except Exception as e:
+                errors.append((name, e))
+                logger.warning("%s failed: %s", name, e)
+                continue
+
+            # Winner: drop the others (a running loser can't be interrupted)
+            for loser in pending:
+                loser.cancel()
+            return name, transcript_text
+
+        if remaining:
+            launch()
+
+    return None, None
+
+
+def fetch_with_ytdlp(video_id, proxy):
     url = f"https://www.youtube.com/watch?v={video_id}"
-    
-    # Method 1: yt-dlp with proxy
-    try:
-        print(f"Method 1: yt-dlp")
-        
-        ydl_opts = {
-            'skip_download': True,
-            'writesubtitles': True,
-            'writeautomaticsub': True,
-            'subtitleslangs': ['en'],
-            'quiet': True,
-            'no_warnings': True,
-            'nocheckcertificate': True,
-        }
-        
-        # Use the proxy parameter
-        if proxy:
-            ydl_opts['proxy'] = proxy
-            print(f"✓ Using proxy")
-        
-        # Step 3: Extract video info
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+
+    # Step 3: Find the caption track, cheap player request first
+    if CAPTION_DISCOVERY == 'player':
+        try:
+            with metrics.span('caption_discovery', path='player'):
+                subtitle_url = discover_caption_url(video_id, proxy=proxy)
+            if subtitle_url:
+                logger.debug("Found captions via player request: %s", video_id)
+                return download_transcript(subtitle_url, proxy)
+        except Exception as e:
+            # Also covers a player track that downloads empty or unparseable
+            logger.info("Player captions failed, using full extract_info: %s", e)
+
+    with metrics.span('caption_discovery', path='ytdlp'):
+        subtitle_url = find_subtitle_url_ytdlp(url, proxy)
+    return download_transcript(subtitle_url, proxy)
+
+
+def download_transcript(subtitle_url, proxy):
+    """Download and parse a caption track into transcript text."""
+    # Step 6: Download subtitle file (pooled keep-alive connection via the proxy)
+    with metrics.span('subtitle_download') as fields:
+        content = http_client.get(subtitle_url, proxy=proxy)
+        fields['bytes'] = len(content)
+    metrics.inc('subtitle_bytes_total', len(content))
+
+    # Step 7: Parse subtitle content (json3, srv3 or VTT)
+    with metrics.span('subtitle_parse') as fields:
+        segments = parse_subtitles(content)
+        fields['format'] = segments.format
+        fields['segments'] = len(segments)
+    transcript_text = segments.text
+    if 'kind=asr' in subtitle_url:
+        # Rolling auto-captions repeat phrases across cues, not just lines
+        transcript_text = ' '.join(collapse_repeats(transcript_text.split()))
+
+    # Step 8: Validate and return
+    if transcript_text.strip():
+        return transcript_text.strip()
+    else:
+        raise Exception("Parsed transcript is empty")
+
+
+def find_subtitle_url_ytdlp(url, proxy):
+    """Full yt-dlp extract_info path for the caption URL."""
+    ydl_opts = {
+        'skip_download': True,
+        'writesubtitles': True,
+        'writeautomaticsub': True,
+        'subtitleslangs': ['en'],
+        'quiet': True,
+        'no_warnings': True,
+        'nocheckcertificate': True,
+        # Don't fetch DASH/HLS manifests or translated tracks we never use
+        'extractor_args': {'youtube': {'skip': ['dash', 'hls', 'translated_subs']}},
+    }
+
+    # Use the proxy parameter
+    if proxy:
+        ydl_opts['proxy'] = proxy
+
+    import yt_dlp  # Deferred: only this fallback path needs it (~50ms import)
+
+    # Extract video info
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        try:
             info = ydl.extract_info(url, download=False)
-            
-            # Step 4: Get English subtitles
-            subtitles = None
-            if 'subtitles' in info and 'en' in info['subtitles']:
-                subtitles = info['subtitles']['en']
-                print("Found manual English subtitles")
-            elif 'automatic_captions' in info and 'en' in info['automatic_captions']:
-                subtitles = info['automatic_captions']['en']
-                print("Found automatic English captions")
-            
-            if not subtitles:
-                raise Exception("No English subtitles available")
-            
-            # Step 5: Find best subtitle URL
-            subtitle_url = None
-            for sub in subtitles:
-                ext = sub.get('ext', '')
-                if ext in ['json3', 'srv3', 'srv2', 'srv1']:
-                    subtitle_url = sub.get('url')
-                    print(f"Found subtitle format: {ext}")
-                    break
-            
-            if not subtitle_url and len(subtitles) > 0:
-                subtitle_url = subtitles[0].get('url')
-                print(f"Using fallback subtitle format: {subtitles[0].get('ext')}")
-            
-            if not subtitle_url:
-                raise Exception("No subtitle URL found")
-            
-            # Step 6: Download subtitle file
-            if proxy_url:
-                proxy_handler = urllib.request.ProxyHandler({
-                    'http': proxy_url,
-                    'https': proxy_url
-                })
-                opener = urllib.request.build_opener(proxy_handler)
-                urllib.request.install_opener(opener)
-                print("Using proxy for subtitle download")
-            
-            req = urllib.request.Request(
-                subtitle_url,
-                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'}
-            )
-            
-            response = urllib.request.urlopen(req, timeout=30)
-            content = response.read()
-            
-            # Step 7: Parse subtitle content
-            transcript_text = ""
-            
-            try:
-                # Try JSON3 format
-                data = json.loads(content)
-                
-                if 'events' in data:
-                    for event in data['events']:
-                        if 'segs' in event:
-                            for seg in event['segs']:
-                                if 'utf8' in seg:
-                                    transcript_text += seg['utf8'] + " "
-                
-                print("Parsed JSON3 subtitle format")
-                                    
-            except json.JSONDecodeError:
-                # Try VTT/plain text format
-                text = content.decode('utf-8', errors='ignore')
-                
-                # Remove VTT headers and timestamps
-                text = re.sub(r'WEBVTT\n', '', text)
-                text = re.sub(r'Kind:.*\n', '', text)
-                text = re.sub(r'Language:.*\n', '', text)
-                text = re.sub(r'\d{2}:\d{2}:\d{2}\.\d{3} --> \d{2}:\d{2}:\d{2}\.\d{3}', '', text)
-                text = re.sub(r'\n\d+\n', ' ', text)
-                text = re.sub(r'<[^>]+>', '', text)  # Remove HTML tags
-                text = ' '.join(text.split())
-                transcript_text = text
-                
-                print("Parsed VTT subtitle format")
-            
-            # Step 8: Validate and return
-            if transcript_text.strip():
-                print(f"✓ Method 1 SUCCESS: {len(transcript_text)} characters")
-                return transcript_text.strip()
-            else:
-                raise Exception("Parsed transcript is empty")
-                
-    except Exception as e:
-        error = str(e)
-        errors.append(f"yt-dlp: {error}")
-        print(f"✗ Method 1 FAILED: {error}")
-    
+        except yt_dlp.utils.DownloadError as e:
+            # Not "Video unavailable": YouTube also shows that when rate limiting
+            if 'private video' in str(e).lower():
+                raise PrivateVideoError(str(e)) from e
+            raise
+
+    # Get English subtitles (manual before automatic), best format first
+    subtitle_url, ext = select_subtitle_url(info, lang='en')
+    if ext is None:
+        raise NoCaptionsError("No English subtitles available")
+
+    if not subtitle_url:
+        raise Exception("No subtitle URL found")
+
+    logger.debug("Found subtitle format: %s", ext)
+    return subtitle_url
+
+
+def fetch_with_transcript_api(video_id):
     # Method 2: youtube-transcript-api (fallback, simpler but may be blocked)
-    try:
-        print(f"Method 2: youtube-transcript-api (no proxy)")
-        time.sleep(2)  # Rate limiting
-        
-        transcript_data = YouTubeTranscriptApi.get_transcript(
-            video_id,
-            languages=['en']
-        )
-        
-        transcript_text = " ".join([entry['text'] for entry in transcript_data])
-        
-        if transcript_text.strip():
-            print(f"✓ Method 2 SUCCESS: {len(transcript_text)} characters")
-            return transcript_text
-            
-    except Exception as e:
-        error = str(e)
-        errors.append(f"youtube-transcript-api: {error}")
-        print(f"✗ Method 2 FAILED: {error}")
-    
-    # Both methods failed - provide helpful error message
-    all_errors = " | ".join(errors)
-    print(f"=" * 60)
-    print(f"ALL METHODS FAILED")
-    print(f"Errors: {all_errors}")
-    print(f"=" * 60)
-    
-    # Determine appropriate error message
-    if "no subtitles" in all_errors.lower() or "transcripts disabled" in all_errors.lower():
-        raise Exception("This video does not have captions available. Please try a different video.")
-    elif "unavailable" in all_errors.lower() or "private" in all_errors.lower():
-        raise Exception("Video is unavailable or private")
-    elif "bot" in all_errors.lower() or "sign in" in all_errors.lower():
+    transcript_data = YouTubeTranscriptApi.get_transcript(
+        video_id,
+        languages=['en']
+    )
+
+    transcript_text = " ".join([entry['text'] for entry in transcript_data])
+
+    if not transcript_text.strip():
+        raise Exception("Transcript is empty")
+
+    return transcript_text
+
+
+# Transcript method errors by cause. Only these exception types say something
+# about the video itself (and are negatively cached); messages are only
+# trusted to spot blocking, which is never cached
+FETCH_ERROR_TYPES = (
+    ('no_captions', (NoCaptionsError, TranscriptsDisabled, NoTranscriptFound)),
+    ('unavailable', (PrivateVideoError, VideoUnavailable)),
+)
+BLOCKED_PATTERNS = ('bot', 'sign in', 'too many requests', 'captcha')
+_HTTP_STATUS = re.compile(r'\bhttp(?: error)? (\d{3})\b|\b(\d{3}) (?:client|server) error\b', re.I)
+
+
+def classify_fetch_error(error):
+    """'no_captions', 'unavailable', 'blocked' or 'error' for a method's exception.
+
+    Anything carrying an HTTP 429 or 5xx status is 'blocked' or 'error',
+    whatever its type or wording.
+    """
+    message = str(error).lower()
+    statuses = {int(code) for match in _HTTP_STATUS.finditer(message) for code in match.groups() if code}
+    if 429 in statuses:
+        return 'blocked'
+    if any(status >= 500 for status in statuses):
+        return 'error'
+    for kind, types in FETCH_ERROR_TYPES:
+        if isinstance(error, types):
+            return kind
+    if any(pattern in message for pattern in BLOCKED_PATTERNS):
+        return 'blocked'
+    return 'error'
+
+
+def raise_fetch_error(errors):
+    # All methods failed - provide helpful error message
+    all_errors = " | ".join(f"{name}: {e}" for name, e in errors)
+    logger.warning("All transcript methods failed: %s", all_errors)
+    
+    # Determine appropriate error message; a method's answer about the video
+    # wins over transient failures of the others
+    kinds = {classify_fetch_error(e) for _, e in errors}
+    if 'no_captions' in kinds:
+        raise TranscriptUnavailable("This video does not have captions available. Please try a different video.")
+    elif 'unavailable' in kinds:
+        raise TranscriptUnavailable("Video is unavailable or private")
+    elif 'blocked' in kinds:
         raise Exception("YouTube is blocking requests. Please try again later.")
     else:
         raise Exception("Unable to fetch transcript. The video may not have captions.")
     
 
 if __name__ == "__main__":
+    job_queue.start()
     app.run()
@@ -0,0 +1,241 @@
+# In-process response cache
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Background refreshes for every TTLCache share this small pool
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cache-refresh')
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a TTL and stale-while-revalidate.
+
+    Fresh entries are returned directly. Once an entry is older than ``ttl``
+    but younger than ``ttl + stale_ttl`` it is still returned immediately,
+    and a single background refresh replaces it. Misses call the loader in
+    the requesting thread, with one loader per key at a time. ``ttl=None``
+    never expires.
+
+    With a ``shared`` tier (see ``cache.shared_cache``) this is the
+    in-process front of a cache every gunicorn worker can see: writes go to
+    both tiers, and local misses or stale entries are looked up in the
+    shared tier before anything is loaded.
+    """
+
+    def __init__(self, ttl, stale_ttl=0, max_entries=1024, max_bytes=None, sizeof=None, shared=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: len(json.dumps(value)))
+        self.shared = shared
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'shared_hits': 0, 'refreshes': 0, 'refresh_errors': 0}
+        self._data = OrderedDict()  # key -> (value, stored_at, size, ttl)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._refreshing = set()
+
+    def _age_state(self, entry, now):
+        """'fresh', 'stale' or None (expired) for a stored entry."""
+        _, stored_at, _, ttl = entry
+        if ttl is None or now - stored_at < ttl:
+            return 'fresh'
+        if now - stored_at < ttl + self.stale_ttl:
+            return 'stale'
+        return None
+
+    def _shared_key(self, key):
+        return key if isinstance(key, str) else json.dumps(key)
+
+    def _lookup(self, key, now):
+        """Entry for ``key``, consulting the shared tier when the local copy
+        is missing or no longer fresh. Returns (entry, state, from_shared)."""
+        with self._lock:
+            entry = self._data.get(key)
+        state = self._age_state(entry, now) if entry is not None else None
+        if state == 'fresh' or self.shared is None:
+            return entry, state, False
+
+        # Another worker may have stored or refreshed it
+        try:
+            envelope = self.shared.get(self._shared_key(key))
+        except Exception as e:
+            logger.warning("Shared cache read failed for %s: %s", key, e)
+            envelope = None
+        if envelope is not None:
+            shared_entry = (envelope['value'], envelope['stored_at'], 0, envelope['ttl'])
+            shared_state = self._age_state(shared_entry, now)
+            if shared_state is not None and (state is None or envelope['stored_at'] > entry[1]):
+                self._store(key, envelope['value'], envelope['stored_at'], envelope['ttl'])
+                return shared_entry, shared_state, True
+        return entry, state, False
+
+    def get(self, key):
+        """Return a fresh cached value, or None."""
+        entry, state, from_shared = self._lookup(key, time.time())
+        with self._lock:
+            if state != 'fresh':
+                self.stats['misses'] += 1
+                return None
+            if key in self._data:
+                self._data.move_to_end(key)
+            self.stats['hits'] += 1
+            if from_shared:
+                self.stats['shared_hits'] += 1
+            return entry[0]
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys with fresh values, with one
+        shared-tier round trip for everything missing locally."""
+        now = time.time()
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is not None and self._age_state(entry, now) == 'fresh':
+                    self._data.move_to_end(key)
+                    found[key] = entry[0]
+                else:
+                    missing.append(key)
+
+        shared_found = 0
+        if missing and self.shared is not None:
+            shared_keys = {self._shared_key(key): key for key in missing}
+            try:
+                envelopes = self.shared.get_many(shared_keys)
+            except Exception as e:
+                logger.warning("Shared cache read failed: %s", e)
+                envelopes = {}
+            for shared_key, envelope in envelopes.items():
+                key = shared_keys[shared_key]
+                if self._age_state((None, envelope['stored_at'], 0, envelope['ttl']), now) == 'fresh':
+                    self._store(key, envelope['value'], envelope['stored_at'], envelope['ttl'])
+                    found[key] = envelope['value']
+                    shared_found += 1
+
+        with self._lock:
+            self.stats['hits'] += len(found)
+            self.stats['shared_hits'] += shared_found
+            self.stats['misses'] += len(keys) - len(found)
+        return found
+
+    def get_or_load(self, key, loader):
+        entry, state, from_shared = self._lookup(key, time.time())
+        with self._lock:
+            if state is not None:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                if from_shared:
+                    self.stats['shared_hits'] += 1
+                if state == 'fresh':
+                    self.stats['hits'] += 1
+                    return entry[0]
+                self.stats['stale_hits'] += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    _refresh_pool.submit(self._refresh, key, loader)
+                return entry[0]
+            self.stats['misses'] += 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Miss: load once per key, later arrivals reuse the result
+        with key_lock:
+            with self._lock:
+                entry = self._data.get(key)
+            if entry is not None and self._age_state(entry, time.time()) == 'fresh':
+                return entry[0]
+            try:
+                value = loader()
+                self.set(key, value)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+            return value
+
+    def _refresh(self, key, loader):
+        try:
+            self.set(key, loader())
+            with self._lock:
+                self.stats['refreshes'] += 1
+        except Exception as e:
+            logger.warning("Cache refresh failed for %s: %s", key, e)
+            with self._lock:
+                self.stats['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def set(self, key, value, ttl=None):
+        """Store ``value`` for ``ttl`` seconds (None = the cache's TTL)."""
+        self.set_many({key: value}, ttl=ttl)
+
+    def set_many(self, items, ttl=None):
+        """Store several values, with one shared-tier write for all of them."""
+        if ttl is None:
+            ttl = self.ttl
+        now = time.time()
+        for key, value in items.items():
+            self._store(key, value, now, ttl)
+
+        if self.shared is not None and items:
+            try:
+                self.shared.set_many(
+                    {self._shared_key(key): {'value': value, 'stored_at': now, 'ttl': ttl}
+                     for key, value in items.items()},
+                    ttl=ttl + self.stale_ttl if ttl is not None else None
+                )
+            except Exception as e:
+                logger.warning("Shared cache write failed: %s", e)
+
+    def _store(self, key, value, stored_at, ttl):
+        size = self.sizeof(value) if self.max_bytes else 0
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (value, stored_at, size, ttl)
+            self._bytes += size
+
+            # Evict least recently used until under both caps
+            while len(self._data) > self.max_entries or (
+                    self.max_bytes and self._bytes > self.max_bytes and len(self._data) > 1):
+                _, (_, _, evicted_size, _) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def delete(self, key):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(key))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+        if self.shared is not None:
+            self.shared.clear()
+
+    def info(self, shared=False):
+        """Counters plus hit rate, entry count and estimated size.
+
+        ``shared=True`` adds the shared tier's info under 'shared'; that can
+        be expensive (RedisCache scans the whole keyspace).
+        """
+        with self._lock:
+            info = dict(self.stats)
+            info['entries'] = len(self._data)
+            info['bytes'] = self._bytes
+        lookups = info['hits'] + info['stale_hits'] + info['misses']
+        info['hit_rate'] = (info['hits'] + info['stale_hits']) / lookups if lookups else 0.0
+        if shared and self.shared is not None:
+            info['shared'] = self.shared.info()
+        return info
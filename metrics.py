@@ -0,0 +1,224 @@
+# Prometheus-format metrics and per-stage timing spans
+import os
+import json
+import glob
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'tubenotes_'
+
+# Seconds; covers cache hits (ms) up to long map-reduce summaries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+# Every worker writes its samples here; /metrics sums all the files so a
+# scrape sees the whole host, whichever worker answers it. A worker's file is
+# removed when it exits (gunicorn child_exit) or, failing that, by the next
+# collect() that finds its PID gone; its counters then reset like a restart's
+METRICS_DIR = os.path.join(CACHE_DIR, 'metrics')
+SNAPSHOT_INTERVAL = float(os.environ.get('METRICS_SNAPSHOT_INTERVAL', 5))
+
+_HELP = {
+    'stage_seconds': ('histogram', 'Time spent in each pipeline stage'),
+    'request_seconds': ('histogram', 'HTTP request latency until the response headers'),
+    'requests_total': ('counter', 'HTTP requests'),
+    'subtitle_bytes_total': ('counter', 'Subtitle bytes downloaded'),
+    'llm_tokens_total': ('counter', 'LLM tokens (input = prompt, output = candidates)'),
+    'transcript_fetch_total': ('counter', 'Transcript fetch attempts per method and outcome'),
+    'transcript_fetch_seconds': ('histogram', 'Successful transcript fetches by winning method, with latency'),
+    'cache_hits_total': ('counter', 'Cache hits (fresh and stale)'),
+    'cache_misses_total': ('counter', 'Cache misses'),
+    'cache_entries': ('gauge', 'Entries in the in-process cache tier'),
+    'singleflight_calls_total': ('counter', 'Coalesced calls: role="leader" ran the work, '
+                                            'role="coalesced" waited for another caller'),
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_caches = {}      # cache name -> TTLCache
+_flights = {}     # name -> SingleFlight
+_last_snapshot = [0.0]
+_snapshot_lock = threading.Lock()
+
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+    _maybe_snapshot()
+
+
+def observe(name, value, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        buckets = _histograms.get(key)
+        if buckets is None:
+            buckets = _histograms[key] = [0] * (len(DEFAULT_BUCKETS) + 2)
+        for i, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                buckets[i] += 1
+        buckets[-2] += value
+        buckets[-1] += 1
+    _maybe_snapshot()
+
+
+@contextmanager
+def span(stage, **labels):
+    """Time a pipeline stage into stage_seconds{stage=...}.
+
+    Yields a dict; anything put in it is logged with the timing.
+    """
+    fields = {}
+    start = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield fields
+    except BaseException:
+        outcome = 'error'
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        observe('stage_seconds', elapsed, stage=stage, outcome=outcome, **labels)
+        logger.debug("span stage=%s outcome=%s seconds=%.3f %s", stage, outcome, elapsed,
+                     ' '.join(f"{key}={value}" for key, value in {**labels, **fields}.items()))
+
+
+def register_cache(name, cache):
+    """Export a TTLCache's counters as cache_*{cache=name}."""
+    _caches[name] = cache
+
+
+def register_singleflight(name, flight):
+    """Export a SingleFlight's counters as singleflight_calls_total{flight=name}."""
+    _flights[name] = flight
+
+
+def _samples():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(value) for key, value in _histograms.items()}
+    gauges = {}
+    for name, cache in _caches.items():
+        info = cache.info()  # Local counters only; never the shared tier
+        labels = (('cache', name),)
+        counters[('cache_hits_total', labels)] = info['hits'] + info['stale_hits']
+        counters[('cache_misses_total', labels)] = info['misses']
+        gauges[('cache_entries', labels)] = info['entries']
+    for name, flight in _flights.items():
+        info = flight.info()
+        counters[('singleflight_calls_total', (('flight', name), ('role', 'leader')))] = info['leaders']
+        counters[('singleflight_calls_total', (('flight', name), ('role', 'coalesced')))] = info['coalesced']
+    return counters, histograms, gauges
+
+
+def _encode(samples):
+    return {kind: [[name, list(labels), value] for (name, labels), value in values.items()]
+            for kind, values in zip(('counters', 'histograms', 'gauges'), samples)}
+
+
+def _maybe_snapshot(force=False):
+    now = time.time()
+    if not force and now - _last_snapshot[0] < SNAPSHOT_INTERVAL:
+        return
+    if not _snapshot_lock.acquire(blocking=force):
+        return  # Another thread is writing it
+    try:
+        _last_snapshot[0] = now
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+        with open(path + '.tmp', 'w') as f:
+            json.dump(_encode(_samples()), f)
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        logger.warning("Metrics snapshot failed: %s", e)
+    finally:
+        _snapshot_lock.release()
+
+
+def remove_snapshot(pid):
+    """Delete an exited worker's snapshot."""
+    try:
+        os.remove(os.path.join(METRICS_DIR, f"{pid}.json"))
+    except OSError:
+        pass
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # EPERM: exists, owned by someone else
+    return True
+
+
+def collect():
+    """Samples summed over every worker's latest snapshot (this one fresh)."""
+    _maybe_snapshot(force=True)
+    counters, histograms, gauges = {}, {}, {}
+    for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+        pid = os.path.basename(path)[:-len('.json')]
+        if pid.isdigit() and not _alive(int(pid)):
+            remove_snapshot(pid)
+            continue
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in snapshot.get('counters', []):
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, value in snapshot.get('histograms', []):
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(value))
+            for i, count in enumerate(value):
+                total[i] += count
+        for name, labels, value in snapshot.get('gauges', []):
+            key = (name, tuple(map(tuple, labels)))
+            gauges[key] = gauges.get(key, 0) + value
+    return counters, histograms, gauges
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+def render():
+    """Prometheus text exposition format (version 0.0.4)."""
+    counters, histograms, gauges = collect()
+    by_name = {}
+    for (name, labels), value in list(counters.items()) + list(gauges.items()):
+        by_name.setdefault(name, []).append((labels, value))
+    for (name, labels), value in histograms.items():
+        by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(by_name):
+        kind, help_text = _HELP.get(name, ('untyped', name))
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        for labels, value in sorted(by_name[name]):
+            if kind != 'histogram':
+                lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+                continue
+            for bound, count in zip(DEFAULT_BUCKETS, value):
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {value[-1]}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {value[-2]}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {value[-1]}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,105 @@
+# Rate limit counters shared by every worker
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from limits.storage import Storage
+from cache import CACHE_DIR, CACHE_REDIS_URL
+
+
+class SQLiteStorage(Storage):
+    """Fixed-window counters for Flask-Limiter in a local SQLite file.
+
+    Registered as ``sqlite:///path/to/file.db``. ``memory://`` keeps one set of
+    counters per gunicorn worker, which multiplies every limit by the worker
+    count; this file is shared by all of them.
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        self.path = urllib.parse.urlparse(uri).path
+        self._local = threading.local()
+        self._writes = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connect().execute(
+            """CREATE TABLE IF NOT EXISTS limits (
+                key TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    def _connect(self):
+        # One connection per thread, re-opened after a fork (gunicorn preload)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        conn = self._connect()
+
+        # Single statement, so concurrent workers can't lose an increment;
+        # an expired window restarts at ``amount``
+        count = conn.execute(
+            """INSERT INTO limits (key, count, expires_at) VALUES (?, ?, ?)
+               ON CONFLICT (key) DO UPDATE SET
+                   count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END,
+                   expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END
+               RETURNING count""",
+            (key, amount, now + expiry, now, now)
+        ).fetchone()[0]
+
+        # Drop expired windows now and then so the table stays small
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            conn.execute("DELETE FROM limits WHERE expires_at <= ?", (now,))
+        return count
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT count FROM limits WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._connect().execute(
+            "SELECT expires_at FROM limits WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            self._connect().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._connect().execute("DELETE FROM limits").rowcount
+
+    def clear(self, key):
+        self._connect().execute("DELETE FROM limits WHERE key = ?", (key,))
+
+
+def limiter_storage_uri():
+    """Redis when CACHE_REDIS_URL is set, otherwise the shared SQLite file."""
+    if CACHE_REDIS_URL:
+        return CACHE_REDIS_URL
+    return 'sqlite:///' + os.path.abspath(os.path.join(CACHE_DIR, 'ratelimits.db')).lstrip('/')
@@ -0,0 +1,133 @@
+# In-flight request coalescing
+import os
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalesce within the process only
+    fcntl = None
+
+# Lock files are striped so the directory never grows past this many files
+LOCK_STRIPES = 4096
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Make concurrent callers for the same key share one unit of work.
+
+    Within a process, the first caller runs the function and the others wait
+    for its result (or exception). Across gunicorn workers, an flock on a
+    per-key lock file serializes the leaders, so a worker that had to wait
+    runs the function after the first one finished, when the work it does
+    should already be in a shared cache.
+
+    Lock files are shared by every key hashing to the same stripe. The holder
+    writes its key into the file, so waiting behind a different key isn't
+    counted (or reported by ``hold``) as coalescing.
+    """
+
+    def __init__(self, lock_dir):
+        self.lock_dir = lock_dir
+        self.stats = {'leaders': 0, 'coalesced': 0}
+        self._calls = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        os.makedirs(lock_dir, exist_ok=True)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def info(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def do(self, key, fn):
+        """Return fn(), running it at most once at a time per key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['leaders'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._process_lock(key) as waited:
+                if waited:
+                    self._count('coalesced')
+                call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @contextmanager
+    def hold(self, key):
+        """Exclusive per-key section across threads and processes.
+
+        Yields True if another caller held the key first, i.e. its result is
+        probably already cached and should be re-checked.
+        """
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+
+        waited = not entry[0].acquire(blocking=False)
+        if waited:
+            entry[0].acquire()
+        try:
+            with self._process_lock(key) as process_waited:
+                waited = waited or process_waited
+                self._count('coalesced' if waited else 'leaders')
+                yield waited
+        finally:
+            entry[0].release()
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    @contextmanager
+    def _process_lock(self, key):
+        if fcntl is None:
+            yield False
+            return
+
+        stripe = int(hashlib.sha1(key.encode('utf-8')).hexdigest(), 16) % LOCK_STRIPES
+        path = os.path.join(self.lock_dir, f"{stripe}.lock")
+        with open(path, 'a+') as f:
+            waited = False
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                # Only the same key counts; otherwise it was a stripe collision
+                f.seek(0)
+                waited = f.read() == key
+            try:
+                f.truncate(0)
+                f.write(key)
+                f.flush()
+                yield waited
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
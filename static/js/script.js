@@ -1,77 +1,242 @@
 let currentPage = 1;
+let totalPages = 1;
 let currentQuery = "";
+let nextCursor = null; // Signed page cursors from the last listing response
+let prevCursor = null;
 let isSummaryLoading = false; // Global flag to track loading state
 
+// Infinite scroll: pages are appended when the sentinel below the grid
+// comes within SCROLL_MARGIN of the viewport. Browsers without
+// IntersectionObserver keep the Previous/Next buttons.
+const infiniteScroll = "IntersectionObserver" in window;
+const SCROLL_MARGIN = "1200px 0px";
+const CARD_BATCH = 12; // Cards built per frame
+let isPageLoading = false;
+let sentinelVisible = false;
+let listingGeneration = 0; // Bumped by every new listing; stale responses are dropped
+let prefetched = null; // { cursor, promise } for the next page
+let scrollObserver = null;
+let scrollPaused = false; // While a URL summary has the grid hidden
+
 // Fetch and render default videos on page load
 document.addEventListener("DOMContentLoaded", (event) => {
-  fetch("/videos")
-    .then((response) => response.json())
+  if (infiniteScroll) {
+    const sentinel = document.createElement("div");
+    sentinel.id = "scroll-sentinel";
+    document.getElementById("video-container").after(sentinel);
+    scrollObserver = new IntersectionObserver(
+      (entries) => {
+        sentinelVisible = entries[0].isIntersecting;
+        if (sentinelVisible) loadNextPage();
+      },
+      { rootMargin: SCROLL_MARGIN }
+    );
+    scrollObserver.observe(sentinel);
+  }
+
+  startListing("/videos");
+});
+
+function fetchPage(url) {
+  return fetch(url).then((response) => {
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    return response.json();
+  });
+}
+
+// Replace the grid with the first page of a new listing
+function startListing(url) {
+  const generation = ++listingGeneration;
+  prefetched = null;
+  currentPage = 1;
+  setCursors({});
+
+  return fetchPage(url)
     .then((videos) => {
-      displayVideos(videos);
-      totalPages = videos.total_pages;
-      document.getElementById(
-        "pageCounter"
-      ).innerText = `Page ${currentPage} of ${totalPages}`;
-      updateButtons();
+      if (generation !== listingGeneration) return;
+      document.getElementById("video-container").innerHTML = ""; // Clear previous results
+      window.scrollTo({ top: 0, behavior: "smooth" });
+      return showPage(videos, generation);
+    })
+    .then(fillViewport)
+    .catch((error) => console.error("Error fetching videos:", error));
+}
+
+function showPage(videos, generation) {
+  setCursors(videos);
+  totalPages = videos.total_pages;
+  document.getElementById(
+    "pageCounter"
+  ).innerText = `Page ${currentPage} of ${totalPages}`;
+  updateButtons();
+
+  return appendVideos(videos.data || [], generation).then(() => {
+    if (generation === listingGeneration && infiniteScroll) schedulePrefetch();
+  });
+}
+
+// The new cards may not have pushed the sentinel out of view yet
+function fillViewport() {
+  if (infiniteScroll && sentinelVisible) loadNextPage();
+}
+
+// An emptied grid puts the sentinel in view; stop loading pages meanwhile
+function pauseInfiniteScroll() {
+  if (!scrollObserver) return;
+  scrollObserver.disconnect();
+  sentinelVisible = false;
+  scrollPaused = true;
+}
+
+function resumeInfiniteScroll() {
+  if (!scrollPaused) return;
+  scrollPaused = false;
+  document.querySelectorAll(".video-card").forEach((card) => {
+    card.style.display = "";
+  });
+  // observe() reports the current intersection, loading a page if needed
+  scrollObserver.observe(document.getElementById("scroll-sentinel"));
+}
+
+function hasNextPage() {
+  return currentPage < totalPages && nextCursor;
+}
+
+// Append the next page (infinite scroll), using the prefetched copy if any
+function loadNextPage() {
+  if (isPageLoading || !hasNextPage()) return;
+  isPageLoading = true;
+
+  const generation = listingGeneration;
+  const cursor = nextCursor;
+  const page =
+    prefetched && prefetched.cursor === cursor
+      ? prefetched.promise
+      : fetchPage(`/next?cursor=${encodeURIComponent(cursor)}`);
+  prefetched = null;
+
+  page
+    .then((videos) => {
+      if (generation !== listingGeneration) return;
+      currentPage++;
+      return showPage(videos, generation);
+    })
+    .catch((error) => console.error("Error fetching videos:", error))
+    .then(() => {
+      // Cleared only here, so no other path can start a second load meanwhile
+      isPageLoading = false;
+      fillViewport();
     });
-});
+}
 
-function displayVideos(videos) {
+// Fetch the next page while the browser is idle, so scrolling reaches it loaded
+function schedulePrefetch() {
+  if (!hasNextPage() || (prefetched && prefetched.cursor === nextCursor)) return;
+  const cursor = nextCursor;
+  const idle = window.requestIdleCallback || ((callback) => setTimeout(callback, 200));
+
+  idle(() => {
+    if (cursor !== nextCursor || prefetched) return;
+    const promise = fetchPage(`/next?cursor=${encodeURIComponent(cursor)}`);
+    prefetched = { cursor, promise };
+    promise.catch(() => {
+      if (prefetched && prefetched.promise === promise) prefetched = null;
+    });
+  });
+}
+
+// Build cards CARD_BATCH at a time, one batch per animation frame, so a
+// 50-video page never blocks input for one long task
+function appendVideos(videos, generation) {
   const container = document.getElementById("video-container");
-  container.innerHTML = ""; // Clear previous results
-
-  videos.data.forEach((video, index) => {
-    console.log("Video data:", video); // Log video data to check structure
-
-    const videoDiv = document.createElement("div");
-    videoDiv.classList.add("video-card");
-    videoDiv.setAttribute("data-video-id", video.video_id);
-    videoDiv.setAttribute("data-card-id", `card-${index}`);
-    videoDiv.setAttribute("data-video-title", video.title);
-    videoDiv.style.cursor = "pointer"; // Make entire card clickable
-
-    // Thumbnail
-    const thumbnail = document.createElement("img");
-    thumbnail.src = video.thumbnail;
-    thumbnail.alt = video.title;
-
-    videoDiv.appendChild(thumbnail);
-
-    // Add video info div with proper class name
-    const videoInfo = document.createElement("div");
-    videoInfo.className = "video-info";
-
-    const title = document.createElement("div");
-    title.className = "video-title";
-    title.textContent = video.title;
-    videoInfo.appendChild(title);
-
-    const details = document.createElement("div");
-    details.className = "video-description";
-    // Format the details string with views
-    details.textContent = `${video.channel} • ${formatViews(
-      video.views || 0
-    )} views • ${formatPostDate(video.postDate)}`;
-    videoInfo.appendChild(details);
-
-    videoDiv.appendChild(videoInfo);
-
-    // Add click handler to the entire card
-    videoDiv.onclick = () => {
-      console.log("Card clicked:", video.video_id); // Debug log
-      fetchSummary(
-        video.video_id,
-        video.title,
-        video.channel,
-        video.views || 0,
-        video.postDate
-      );
-    };
+  let index = 0;
+
+  return new Promise((resolve) => {
+    const renderBatch = () => {
+      if (generation !== listingGeneration) return resolve();
+      const fragment = document.createDocumentFragment();
+      const offset = container.childElementCount;
+      videos.slice(index, index + CARD_BATCH).forEach((video, i) => {
+        fragment.appendChild(createVideoCard(video, offset + i));
+      });
+      container.appendChild(fragment);
+      index += CARD_BATCH;
 
-    container.appendChild(videoDiv);
+      if (index < videos.length) {
+        requestAnimationFrame(renderBatch);
+      } else {
+        resolve();
+      }
+    };
+    renderBatch();
   });
 }
 
+// YouTube serves every thumbnail size under the same path: mqdefault
+// 320x180, hqdefault 480x360. (sddefault is missing for many videos.)
+function thumbnailSrcset(url) {
+  const match = /^(https:\/\/i\.ytimg\.com\/vi\/[^/]+\/)(?:mq|hq|sd)default\.jpg$/.exec(url);
+  if (!match) return null;
+  return `${match[1]}mqdefault.jpg 320w, ${match[1]}hqdefault.jpg 480w`;
+}
+
+function createVideoCard(video, index) {
+  const videoDiv = document.createElement("div");
+  videoDiv.classList.add("video-card");
+  videoDiv.setAttribute("data-video-id", video.video_id);
+  videoDiv.setAttribute("data-card-id", `card-${index}`);
+  videoDiv.setAttribute("data-video-title", video.title);
+  videoDiv.style.cursor = "pointer"; // Make entire card clickable
+
+  // Thumbnail: only fetched near the viewport, smallest size that fits
+  const thumbnail = document.createElement("img");
+  thumbnail.loading = "lazy";
+  thumbnail.decoding = "async";
+  thumbnail.width = 320;
+  thumbnail.height = 180;
+  const srcset = thumbnailSrcset(video.thumbnail);
+  if (srcset) {
+    thumbnail.srcset = srcset;
+    thumbnail.sizes = "(max-width: 768px) 100vw, 440px";
+  }
+  thumbnail.src = video.thumbnail;
+  thumbnail.alt = video.title;
+
+  videoDiv.appendChild(thumbnail);
+
+  // Add video info div with proper class name
+  const videoInfo = document.createElement("div");
+  videoInfo.className = "video-info";
+
+  const title = document.createElement("div");
+  title.className = "video-title";
+  title.textContent = video.title;
+  videoInfo.appendChild(title);
+
+  const details = document.createElement("div");
+  details.className = "video-description";
+  // Format the details string with views
+  details.textContent = `${video.channel} • ${formatViews(
+    video.views || 0
+  )} views • ${formatPostDate(video.postDate)}`;
+  videoInfo.appendChild(details);
+
+  videoDiv.appendChild(videoInfo);
+
+  // Add click handler to the entire card
+  videoDiv.onclick = () => {
+    fetchSummary(
+      video.video_id,
+      video.title,
+      video.channel,
+      video.views || 0,
+      video.postDate
+    );
+  };
+
+  return videoDiv;
+}
+
 function formatViews(views) {
   if (views >= 1000000) {
     return (views / 1000000).toFixed(1) + "M";
@@ -109,63 +274,56 @@ function formatPostDate(postDate) {
   }
 }
 
+function setCursors(videos) {
+  nextCursor = videos.next_cursor || null;
+  prevCursor = videos.prev_cursor || null;
+}
+
 function updateButtons() {
   const prevBtn = document.getElementById("prevBtn");
   const nextBtn = document.getElementById("nextBtn");
 
-  if (currentPage === 1) {
+  if (infiniteScroll || currentPage === 1 || !prevCursor) {
     prevBtn.style.display = "none";
   } else {
     prevBtn.style.display = "inline-block";
   }
 
-  if (currentPage === totalPages) {
+  if (infiniteScroll || currentPage === totalPages || !nextCursor) {
     nextBtn.style.display = "none";
   } else {
     nextBtn.style.display = "inline-block";
   }
 }
 
+// Previous/Next buttons (only shown without infinite scroll)
+function showButtonPage(url) {
+  const generation = ++listingGeneration;
+  fetchPage(url)
+    .then((videos) => {
+      if (generation !== listingGeneration) return;
+      document.getElementById("video-container").innerHTML = "";
+      showPage(videos, generation);
+      window.scrollTo({ top: 0, behavior: "smooth" });
+    })
+    .catch((error) => console.error("Error fetching videos:", error));
+}
+
 function nextPage() {
-  if (currentPage < totalPages) {
+  if (currentPage < totalPages && nextCursor) {
     currentPage++;
-    const encodedQuery = encodeURIComponent(currentQuery);
-
-    fetch(`/next?query=${encodedQuery}`) // No pageToken in URL
-      .then((response) => response.json())
-      .then((videos) => {
-        displayVideos(videos);
-        totalPages = videos.total_pages;
-        document.getElementById(
-          "pageCounter"
-        ).innerText = `Page ${currentPage} of ${totalPages}`;
-        updateButtons();
-        window.scrollTo({ top: 0, behavior: "smooth" });
-      });
+    showButtonPage(`/next?cursor=${encodeURIComponent(nextCursor)}`);
   }
 }
 
 function prevPage() {
-  if (currentPage > 1) {
+  if (currentPage > 1 && prevCursor) {
     currentPage--;
-    const encodedQuery = encodeURIComponent(currentQuery);
-
-    fetch(`/prev?query=${encodedQuery}`) // No pageToken in URL
-      .then((response) => response.json())
-      .then((videos) => {
-        displayVideos(videos);
-        totalPages = videos.total_pages;
-        document.getElementById(
-          "pageCounter"
-        ).innerText = `Page ${currentPage} of ${totalPages}`;
-        updateButtons();
-        window.scrollTo({ top: 0, behavior: "smooth" });
-      });
+    showButtonPage(`/prev?cursor=${encodeURIComponent(prevCursor)}`);
   }
 }
 
 function searchVideos() {
-  currentPage = 1;
   currentQuery = document.getElementById("search-query").value;
 
   // Regular expression to check if the query is a YouTube URL and extract video ID
@@ -186,22 +344,329 @@ function searchVideos() {
   // FIXED: Properly encode the query for URL
   const encodedQuery = encodeURIComponent(currentQuery);
 
-  fetch(`/search?query=${encodedQuery}`)
-    .then((response) => response.json())
-    .then((videos) => {
-      displayVideos(videos);
-      document.getElementById(
-        "pageCounter"
-      ).innerText = `Page ${currentPage} of ${totalPages}`;
-      updateButtons();
-
-      // Scroll to the top of the page
-      window.scrollTo({
-        top: 0,
-        behavior: "smooth",
+  startListing(`/search?query=${encodedQuery}`);
+}
+
+// Stream summary sections from the server as they are generated (SSE).
+// handlers: onSection(section), onDone(summary), onError(message)
+function streamSummary(videoId, handlers) {
+  const source = new EventSource(
+    `/summarize/stream?videoId=${encodeURIComponent(videoId)}`
+  );
+  let finished = false;
+
+  source.addEventListener("section", (event) => {
+    handlers.onSection(JSON.parse(event.data));
+  });
+
+  source.addEventListener("done", (event) => {
+    finished = true;
+    source.close();
+    handlers.onDone(JSON.parse(event.data).summary);
+  });
+
+  // Fires for both server-sent error events and dropped connections
+  source.addEventListener("error", (event) => {
+    if (finished) return;
+    finished = true;
+    source.close();
+
+    let message = "Failed to fetch summary. Please try again.";
+    if (event.data) {
+      try {
+        message = JSON.parse(event.data).error || message;
+      } catch (e) {
+        // Keep the generic message
+      }
+    }
+    handlers.onError(message);
+  });
+}
+
+// Browser-side summary cache: IndexedDB (kept across visits) behind a small
+// in-memory map. Entries are tagged with the server's summary version (model,
+// prompt and schema fingerprint from the page) and only replayed when it
+// matches. Least recently used entries are evicted past the size caps.
+const SUMMARY_DB = "tubenotes";
+const SUMMARY_STORE = "summaries";
+const SUMMARY_CACHE_MAX_BYTES = 5 * 1024 * 1024;
+const SUMMARY_CACHE_MAX_ENTRIES = 500;
+const SUMMARY_MEMORY_ENTRIES = 50;
+const summaryVersionTag = document.querySelector('meta[name="summary-version"]');
+const summaryVersion = (summaryVersionTag && summaryVersionTag.content) || "1";
+
+let summaryDB = null; // Promise of the IDBDatabase, or null without IndexedDB
+const summaryMemory = new Map(); // videoId -> summary, oldest first
+const inflightSummaries = new Map(); // videoId -> { sections, handlers }
+
+function openSummaryDB() {
+  if (!summaryDB) {
+    summaryDB = new Promise((resolve) => {
+      if (!window.indexedDB) return resolve(null);
+      const request = indexedDB.open(SUMMARY_DB, 1);
+      request.onupgradeneeded = () => {
+        const store = request.result.createObjectStore(SUMMARY_STORE, {
+          keyPath: "videoId",
+        });
+        store.createIndex("usedAt", "usedAt");
+      };
+      request.onsuccess = () => resolve(request.result);
+      // Private browsing or storage disabled: memory only
+      request.onerror = () => resolve(null);
+      request.onblocked = () => resolve(null);
+    });
+  }
+  return summaryDB;
+}
+
+function rememberSummary(videoId, summary) {
+  summaryMemory.delete(videoId);
+  summaryMemory.set(videoId, summary);
+  if (summaryMemory.size > SUMMARY_MEMORY_ENTRIES) {
+    summaryMemory.delete(summaryMemory.keys().next().value);
+  }
+}
+
+function readCachedSummary(videoId) {
+  return openSummaryDB()
+    .then((db) => {
+      if (!db) return null;
+      return new Promise((resolve) => {
+        const store = db
+          .transaction(SUMMARY_STORE, "readwrite")
+          .objectStore(SUMMARY_STORE);
+        const request = store.get(videoId);
+        request.onsuccess = () => {
+          const entry = request.result;
+          if (!entry || entry.version !== summaryVersion) return resolve(null);
+          entry.usedAt = Date.now(); // Recently used entries are evicted last
+          store.put(entry);
+          resolve(entry.summary);
+        };
+        request.onerror = () => resolve(null);
       });
     })
-    .catch((error) => console.error("Error fetching videos:", error));
+    .catch(() => null);
+}
+
+function storeSummary(videoId, summary) {
+  openSummaryDB()
+    .then((db) => {
+      if (!db) return;
+      const store = db
+        .transaction(SUMMARY_STORE, "readwrite")
+        .objectStore(SUMMARY_STORE);
+      const now = Date.now();
+      store.put({
+        videoId,
+        version: summaryVersion,
+        summary,
+        size: JSON.stringify(summary).length,
+        storedAt: now,
+        usedAt: now,
+      });
+      evictSummaries(store);
+    })
+    .catch((error) => console.error("Summary cache write failed:", error));
+}
+
+// Walk entries newest first: keep them while under both caps, delete the
+// rest and anything written for another summary version
+function evictSummaries(store) {
+  let bytes = 0;
+  let count = 0;
+  const request = store.index("usedAt").openCursor(null, "prev");
+  request.onsuccess = () => {
+    const cursor = request.result;
+    if (!cursor) return;
+    const entry = cursor.value;
+    if (
+      entry.version !== summaryVersion ||
+      count >= SUMMARY_CACHE_MAX_ENTRIES ||
+      bytes + entry.size > SUMMARY_CACHE_MAX_BYTES
+    ) {
+      cursor.delete();
+    } else {
+      count++;
+      bytes += entry.size;
+    }
+    cursor.continue();
+  };
+}
+
+// Same handlers as streamSummary, answered from the browser cache when
+// possible. Calls for a video whose summary is already on its way join that
+// request (sections so far are replayed) instead of opening another stream.
+function loadSummary(videoId, handlers) {
+  let flight = inflightSummaries.get(videoId);
+  if (flight) {
+    flight.sections.forEach((section) => handlers.onSection(section));
+    flight.handlers.push(handlers);
+    return;
+  }
+
+  flight = { sections: [], handlers: [handlers] };
+  inflightSummaries.set(videoId, flight);
+  const emit = (event, value) =>
+    flight.handlers.forEach((handler) => handler[event](value));
+  const finish = (event, value) => {
+    inflightSummaries.delete(videoId);
+    emit(event, value);
+  };
+
+  const remembered = summaryMemory.get(videoId);
+  const cached = remembered
+    ? Promise.resolve(remembered)
+    : readCachedSummary(videoId);
+
+  cached.then((summary) => {
+    if (summary) {
+      rememberSummary(videoId, summary);
+      (summary.sections || []).forEach((section) => emit("onSection", section));
+      finish("onDone", summary);
+      return;
+    }
+
+    streamSummary(videoId, {
+      onSection: (section) => {
+        flight.sections.push(section);
+        emit("onSection", section);
+      },
+      onDone: (summary) => {
+        if (summary && Array.isArray(summary.sections) && summary.sections.length) {
+          rememberSummary(videoId, summary);
+          storeSummary(videoId, summary);
+        }
+        finish("onDone", summary);
+      },
+      onError: (message) => finish("onError", message),
+    });
+  });
+}
+
+// Append one summary section (header + two bullets) to the modal
+function renderSection(summaryContent, section, index) {
+  const { header, bullets } = section;
+
+  if (header && Array.isArray(bullets) && bullets.length === 2) {
+    // Create section container
+    const sectionContainer = document.createElement("div");
+
+    // Create header element
+    const headerElement = document.createElement("h3");
+    headerElement.textContent = header.replace(/&#39;/g, "'");
+    summaryContent.appendChild(headerElement);
+
+    // Create bullet list
+    const bulletList = document.createElement("ul");
+
+    // Add bullet points
+    bullets.forEach((bullet) => {
+      const bulletItem = document.createElement("li");
+      bulletItem.textContent = bullet.replace(/&#39;/g, "'");
+      bulletList.appendChild(bulletItem);
+    });
+
+    sectionContainer.appendChild(bulletList);
+    summaryContent.appendChild(sectionContainer);
+  } else {
+    // Handle missing or malformed fields
+    const errorElement = document.createElement("p");
+    errorElement.textContent = `Incomplete data for section ${
+      index + 1
+    }. Unable to display the summary.`;
+    summaryContent.appendChild(errorElement);
+  }
+}
+
+function renderSummaryFooter(summaryContent, summary, videoId, videoTitle, sectionCount) {
+  if (sectionCount === 0) {
+    const errorElement = document.createElement("p");
+    errorElement.textContent = "Summary data is not in the expected format.";
+    summaryContent.appendChild(errorElement);
+  }
+
+  // Set YouTube link
+  const youtubeLink = document.getElementById("youtube-link");
+  youtubeLink.href = `https://www.youtube.com/watch?v=${videoId}`;
+
+  // Configure download button for PDF summary
+  const downloadLink = document.getElementById("download-link");
+  downloadLink.style.display = "inline-block";
+  downloadLink.onclick = () => generatePDF(summary, videoTitle);
+}
+
+function createCopyButton(summaryContent) {
+  // Add Copy Text button with icon
+  const copyButton = document.createElement("button");
+  copyButton.style.display = "inline-flex";
+  copyButton.style.alignItems = "center";
+  copyButton.style.justifyContent = "center";
+  copyButton.style.border = "1px solid #ddd";
+  copyButton.style.borderRadius = "8px";
+  copyButton.style.padding = "10px";
+  copyButton.style.background = "#fff";
+  copyButton.style.cursor = "pointer";
+  copyButton.style.width = "48px";
+  copyButton.style.height = "48px";
+
+  // Create an SVG icon with larger dimensions
+  const copyIcon = document.createElementNS("http://www.w3.org/2000/svg", "svg");
+  copyIcon.setAttribute("width", "32");
+  copyIcon.setAttribute("height", "32");
+  copyIcon.setAttribute("viewBox", "0 0 24 24");
+  copyIcon.setAttribute("fill", "none");
+  copyIcon.setAttribute("stroke", "currentColor");
+  copyIcon.setAttribute("stroke-width", "2");
+  copyIcon.setAttribute("stroke-linecap", "round");
+  copyIcon.setAttribute("stroke-linejoin", "round");
+
+  // Define paths for the icon
+  const rect1 = document.createElementNS("http://www.w3.org/2000/svg", "rect");
+  rect1.setAttribute("x", "9");
+  rect1.setAttribute("y", "9");
+  rect1.setAttribute("width", "12");
+  rect1.setAttribute("height", "15");
+  rect1.setAttribute("rx", "2");
+  rect1.setAttribute("ry", "2");
+
+  const rect2 = document.createElementNS("http://www.w3.org/2000/svg", "rect");
+  rect2.setAttribute("x", "5");
+  rect2.setAttribute("y", "5");
+  rect2.setAttribute("width", "12");
+  rect2.setAttribute("height", "15");
+  rect2.setAttribute("rx", "2");
+  rect2.setAttribute("ry", "2");
+
+  // Add rectangles to the SVG
+  copyIcon.appendChild(rect2); // Back rectangle
+  copyIcon.appendChild(rect1); // Front rectangle
+
+  // Append the SVG to the button
+  copyButton.appendChild(copyIcon);
+
+  // Configure Copy Text button
+  copyButton.onclick = () => {
+    // Get the summary text
+    const summaryText = summaryContent.innerText;
+
+    // Create a temporary textarea element to hold the summary text
+    const tempTextArea = document.createElement("textarea");
+    tempTextArea.value = summaryText;
+    document.body.appendChild(tempTextArea);
+
+    // Select the text and copy it to the clipboard
+    tempTextArea.select();
+    document.execCommand("copy");
+
+    // Remove the temporary textarea element
+    document.body.removeChild(tempTextArea);
+
+    // Alert the user that the text has been copied
+    alert("Summary text copied to clipboard.");
+  };
+
+  return copyButton;
 }
 
 function fetchURLSummary(videoId, videoTitle) {
@@ -211,6 +676,7 @@ function fetchURLSummary(videoId, videoTitle) {
   }
 
   isSummaryLoading = true; // Set loading flag
+  pauseInfiniteScroll();
 
   // Hide all video cards
   const videoCards = document.querySelectorAll(".video-card");
@@ -227,6 +693,7 @@ function fetchURLSummary(videoId, videoTitle) {
     console.error("Main content area not found.");
     isSummaryLoading = false; // Reset flag
     hideLoadingOverlay(); // Ensure overlay is hidden
+    resumeInfiniteScroll();
     return;
   }
 
@@ -249,103 +716,63 @@ function fetchURLSummary(videoId, videoTitle) {
   mainContent.innerHTML = "";
   mainContent.appendChild(spinnerContainer);
 
-  // Fetch summary
-  fetch(`/summarize?videoId=${videoId}`)
-    .then((response) => response.json())
-    .then((data) => {
-      if (!data || typeof data.summary === "undefined") {
-        console.error("Summary data is missing or undefined.");
-        alert("The server did not return valid summary data.");
-        return;
-      }
+  const summaryContent = document.getElementById("summary-content");
+  let modalOpened = false;
+  let sectionCount = 0;
 
-      // Proceed with rendering summary
-      const summary = data.summary;
-      console.log("Summary data:", summary);
+  // Open the modal as soon as the first section arrives
+  const openModal = () => {
+    modalOpened = true;
+    hideLoadingOverlay(); // Hide the overlay once the first section is in
 
-      isSummaryLoading = false; // Reset flag
-      hideLoadingOverlay(); // Hide the overlay once loading is complete
-
-      // Restore original content
-      mainContent.innerHTML = originalContent;
-
-      // Display summary in modal
-      const summaryContent = document.getElementById("summary-content");
-      summaryContent.innerHTML = ""; // Clear existing content
-
-      // Add summary details
-      const mainHeader = document.createElement("h2");
-      mainHeader.textContent = "✨";
-      summaryContent.appendChild(mainHeader);
-
-      const titleElement = document.createElement("h2");
-      titleElement.textContent = videoTitle;
-      summaryContent.appendChild(titleElement);
-
-      if (Array.isArray(summary.sections)) {
-        summary.sections.forEach((section, index) => {
-          const { header, bullets } = section;
-
-          if (header && Array.isArray(bullets) && bullets.length === 2) {
-            // Create section container
-            const sectionContainer = document.createElement("div");
-
-            // Create header element
-            const headerElement = document.createElement("h3");
-            headerElement.textContent = header;
-            summaryContent.appendChild(headerElement);
-
-            // Create bullet list
-            const bulletList = document.createElement("ul");
-
-            // Add bullet points
-            bullets.forEach((bullet) => {
-              const bulletItem = document.createElement("li");
-              bulletItem.textContent = bullet;
-              bulletList.appendChild(bulletItem);
-            });
-
-            sectionContainer.appendChild(bulletList);
-            summaryContent.appendChild(sectionContainer);
-          } else {
-            // Handle missing or malformed fields
-            const errorElement = document.createElement("p");
-            errorElement.textContent = `Incomplete data for section ${
-              index + 1
-            }. Unable to display the summary.`;
-            summaryContent.appendChild(errorElement);
-          }
-        });
-      } else {
-        const errorElement = document.createElement("p");
-        errorElement.textContent =
-          "Summary data is not in the expected format.";
-        summaryContent.appendChild(errorElement);
-      }
+    // Restore original content
+    mainContent.innerHTML = originalContent;
 
-      // Set YouTube link
-      const youtubeLink = document.getElementById("youtube-link");
-      youtubeLink.href = `https://www.youtube.com/watch?v=${videoId}`;
+    // Display summary in modal
+    summaryContent.innerHTML = ""; // Clear existing content
 
-      // Configure download button for PDF summary
-      const downloadLink = document.getElementById("download-link");
-      downloadLink.style.display = "inline-block";
-      downloadLink.onclick = () => generatePDF(summary, videoTitle);
+    // Add summary details
+    const mainHeader = document.createElement("h2");
+    mainHeader.textContent = "✨";
+    summaryContent.appendChild(mainHeader);
 
-      // Show modal
-      document.getElementById("summaryModal").style.display = "block";
-    })
-    .catch((error) => {
+    const titleElement = document.createElement("h2");
+    titleElement.textContent = videoTitle;
+    summaryContent.appendChild(titleElement);
+
+    // Hide the PDF button until the summary is complete
+    document.getElementById("download-link").style.display = "none";
+
+    // Show modal
+    document.getElementById("summaryModal").style.display = "block";
+  };
+
+  loadSummary(videoId, {
+    onSection: (section) => {
+      if (!modalOpened) openModal();
+      renderSection(summaryContent, section, sectionCount++);
+    },
+    onDone: (summary) => {
+      console.log("Summary data:", summary);
+      isSummaryLoading = false; // Reset flag
+      if (!modalOpened) openModal();
+      renderSummaryFooter(summaryContent, summary, videoId, videoTitle, sectionCount);
+    },
+    onError: (message) => {
       isSummaryLoading = false; // Reset flag
-      console.error("Error fetching summary:", error);
+      console.error("Error fetching summary:", message);
 
-      hideLoadingOverlay(); // Ensure overlay is hidden
+      if (!modalOpened) {
+        hideLoadingOverlay(); // Ensure overlay is hidden
 
-      // Restore original content
-      mainContent.innerHTML = originalContent;
+        // Restore original content
+        mainContent.innerHTML = originalContent;
+        resumeInfiniteScroll();
+      }
 
-      alert("Failed to fetch summary. Please try again.");
-    });
+      alert(message);
+    },
+  });
 }
 
 function fetchSummary(
@@ -412,213 +839,74 @@ function fetchSummary(
   targetCard.innerHTML = "";
   targetCard.appendChild(spinnerContainer);
 
-  // Fetch summary
-  fetch(`/summarize?videoId=${videoId}`)
-    .then((response) => response.json())
-    .then((data) => {
-      if (!data || typeof data.summary === "undefined") {
-        console.error("Summary data is missing or undefined.");
-        alert("The server did not return valid summary data.");
-        return;
-      }
+  // Put the card back the way it was
+  const restoreCard = () => {
+    hideLoadingOverlay();
+    enableVideoClicks(); // Re-enable clicks
 
-      // Proceed with rendering summary
-      const summary = data.summary;
+    // Restore original content
+    targetCard.innerHTML = originalContent;
+
+    // Reattach event handler
+    const thumbnail = targetCard.querySelector("img");
+    thumbnail.onclick = () =>
+      fetchSummary(videoId, videoTitle, videoChannel, videoViews, videoPostDate);
+  };
+
+  const summaryContent = document.getElementById("summary-content");
+  let modalOpened = false;
+  let sectionCount = 0;
+
+  // Open the modal as soon as the first section arrives
+  const openModal = () => {
+    modalOpened = true;
+    restoreCard();
+
+    // Display summary in modal
+    summaryContent.innerHTML = ""; // Clear existing content
+    summaryContent.appendChild(createCopyButton(summaryContent));
+
+    // Add video info
+    const titleElement = document.createElement("h2");
+    titleElement.textContent = videoTitle.replace(/&#39;/g, "'");
+    summaryContent.appendChild(titleElement);
+
+    const details = document.createElement("p");
+    details.textContent = `${videoChannel} • ${formatViews(
+      videoViews
+    )} views • ${formatPostDate(videoPostDate)}`;
+    summaryContent.appendChild(details);
+
+    const space = document.createElement("br");
+    summaryContent.appendChild(space);
+
+    // Hide the PDF button until the summary is complete
+    document.getElementById("download-link").style.display = "none";
+
+    // Show modal
+    document.getElementById("summaryModal").style.display = "block";
+  };
+
+  loadSummary(videoId, {
+    onSection: (section) => {
+      if (!modalOpened) openModal();
+      renderSection(summaryContent, section, sectionCount++);
+    },
+    onDone: (summary) => {
       console.log("Summary data:", summary);
-
       isSummaryLoading = false; // Reset flag
-      hideLoadingOverlay(); // Hide the overlay once loading is complete
-      enableVideoClicks(); // Re-enable clicks
-
-      // Restore original content
-      targetCard.innerHTML = originalContent;
-
-      // Reattach event handler
-      const thumbnail = targetCard.querySelector("img");
-      thumbnail.onclick = () =>
-        fetchSummary(
-          videoId,
-          videoTitle,
-          videoChannel,
-          videoViews,
-          videoPostDate
-        );
-
-      // Display summary in modal
-      const summaryContent = document.getElementById("summary-content");
-      summaryContent.innerHTML = ""; // Clear existing content
-
-      // Add Copy Text button with icon
-      const copyButton = document.createElement("button");
-      copyButton.style.display = "inline-flex";
-      copyButton.style.alignItems = "center";
-      copyButton.style.justifyContent = "center";
-      copyButton.style.border = "1px solid #ddd";
-      copyButton.style.borderRadius = "8px";
-      copyButton.style.padding = "10px";
-      copyButton.style.background = "#fff";
-      copyButton.style.cursor = "pointer";
-      copyButton.style.width = "48px";
-      copyButton.style.height = "48px";
-
-      // Create an SVG icon with larger dimensions
-      const copyIcon = document.createElementNS(
-        "http://www.w3.org/2000/svg",
-        "svg"
-      );
-      copyIcon.setAttribute("width", "32");
-      copyIcon.setAttribute("height", "32");
-      copyIcon.setAttribute("viewBox", "0 0 24 24");
-      copyIcon.setAttribute("fill", "none");
-      copyIcon.setAttribute("stroke", "currentColor");
-      copyIcon.setAttribute("stroke-width", "2");
-      copyIcon.setAttribute("stroke-linecap", "round");
-      copyIcon.setAttribute("stroke-linejoin", "round");
-
-      // Define paths for the icon
-      const rect1 = document.createElementNS(
-        "http://www.w3.org/2000/svg",
-        "rect"
-      );
-      rect1.setAttribute("x", "9");
-      rect1.setAttribute("y", "9");
-      rect1.setAttribute("width", "12");
-      rect1.setAttribute("height", "15");
-      rect1.setAttribute("rx", "2");
-      rect1.setAttribute("ry", "2");
-
-      const rect2 = document.createElementNS(
-        "http://www.w3.org/2000/svg",
-        "rect"
-      );
-      rect2.setAttribute("x", "5");
-      rect2.setAttribute("y", "5");
-      rect2.setAttribute("width", "12");
-      rect2.setAttribute("height", "15");
-      rect2.setAttribute("rx", "2");
-      rect2.setAttribute("ry", "2");
-
-      // Add rectangles to the SVG
-      copyIcon.appendChild(rect2); // Back rectangle
-      copyIcon.appendChild(rect1); // Front rectangle
-
-      // Append the SVG to the button
-      copyButton.appendChild(copyIcon);
-
-      // Append the button to the desired container
-      summaryContent.appendChild(copyButton);
-
-      // Add video info
-      const titleElement = document.createElement("h2");
-      titleElement.textContent = videoTitle.replace(/&#39;/g, "'");
-      summaryContent.appendChild(titleElement);
-
-      const details = document.createElement("p");
-      details.textContent = `${videoChannel} • ${formatViews(
-        videoViews
-      )} views • ${formatPostDate(videoPostDate)}`;
-      summaryContent.appendChild(details);
-
-      const space = document.createElement("br");
-      summaryContent.appendChild(space);
-
-      if (Array.isArray(summary.sections)) {
-        summary.sections.forEach((section, index) => {
-          const { header, bullets } = section;
-
-          if (header && Array.isArray(bullets) && bullets.length === 2) {
-            // Create section container
-            const sectionContainer = document.createElement("div");
-
-            // Create header element
-            const headerElement = document.createElement("h3");
-            headerElement.textContent = header.replace(/&#39;/g, "'");
-            summaryContent.appendChild(headerElement);
-
-            // Create bullet list
-            const bulletList = document.createElement("ul");
-
-            // Add bullet points
-            bullets.forEach((bullet) => {
-              const bulletItem = document.createElement("li");
-              bulletItem.textContent = bullet.replace(/&#39;/g, "'");
-              bulletList.appendChild(bulletItem);
-            });
-
-            sectionContainer.appendChild(bulletList);
-            summaryContent.appendChild(sectionContainer);
-          } else {
-            // Handle missing or malformed fields
-            const errorElement = document.createElement("p");
-            errorElement.textContent = `Incomplete data for section ${
-              index + 1
-            }. Unable to display the summary.`;
-            summaryContent.appendChild(errorElement);
-          }
-        });
-      } else {
-        const errorElement = document.createElement("p");
-        errorElement.textContent =
-          "Summary data is not in the expected format.";
-        summaryContent.appendChild(errorElement);
-      }
-
-      // Configure Copy Text button
-      copyButton.onclick = () => {
-        // Get the summary text
-        const summaryText = summaryContent.innerText;
-
-        // Create a temporary textarea element to hold the summary text
-        const tempTextArea = document.createElement("textarea");
-        tempTextArea.value = summaryText;
-        document.body.appendChild(tempTextArea);
-
-        // Select the text and copy it to the clipboard
-        tempTextArea.select();
-        document.execCommand("copy");
-
-        // Remove the temporary textarea element
-        document.body.removeChild(tempTextArea);
-
-        // Alert the user that the text has been copied
-        alert("Summary text copied to clipboard.");
-      };
-
-      // Set YouTube link
-      const youtubeLink = document.getElementById("youtube-link");
-      youtubeLink.href = `https://www.youtube.com/watch?v=${videoId}`;
+      if (!modalOpened) openModal();
+      renderSummaryFooter(summaryContent, summary, videoId, videoTitle, sectionCount);
+    },
+    onError: (message) => {
+      isSummaryLoading = false; // Reset flag
+      console.error("Error fetching summary:", message);
 
-      // Configure download button for PDF summary
-      const downloadLink = document.getElementById("download-link");
-      downloadLink.style.display = "inline-block";
-      downloadLink.onclick = () => generatePDF(summary, videoTitle);
+      if (!modalOpened) restoreCard();
 
-      // Show modal
-      document.getElementById("summaryModal").style.display = "block";
-    })
-    .catch((error) => {
-      isSummaryLoading = false; // Reset flag
-      console.error("Error fetching summary:", error);
-
-      hideLoadingOverlay(); // Ensure overlay is hidden
-      enableVideoClicks(); // Re-enable clicks
-
-      // Restore original content
-      targetCard.innerHTML = originalContent;
-
-      // Reattach event handler
-      const thumbnail = targetCard.querySelector("img");
-      thumbnail.onclick = () =>
-        fetchSummary(
-          videoId,
-          videoTitle,
-          videoChannel,
-          videoViews,
-          videoPostDate
-        );
-
-      alert("Failed to fetch summary. Please try again.");
-    });
+      alert(message);
+    },
+  });
 }
 
 // Utility to enable clicks on video cards
@@ -720,12 +1008,13 @@ function generatePDF(summary, videoTitle) {
 
 function closeModal() {
   document.getElementById("summaryModal").style.display = "none";
+  resumeInfiniteScroll();
 }
 
 window.onclick = function (event) {
   const modal = document.getElementById("summaryModal");
   if (event.target == modal) {
-    modal.style.display = "none";
+    closeModal();
   }
 };
 
@@ -0,0 +1,158 @@
+# Subtitle parsing (json3, srv3, VTT)
+import re
+import json
+import html
+from array import array
+import xml.etree.ElementTree as ET
+
+_VTT_TIMING = re.compile(
+    r'(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})\s+-->\s+(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})'
+)
+_TAG = re.compile(r'<[^>]+>')
+
+
+class Segments:
+    """Compact transcript: parallel timing arrays plus one text buffer.
+
+    ``starts`` and ``durations`` are milliseconds; segment ``i`` is
+    ``text[offsets[i]:offsets[i + 1]]`` (with the joining space stripped).
+    """
+
+    __slots__ = ('format', 'starts', 'durations', 'offsets', 'text')
+
+    def __init__(self, format, starts, durations, pieces):
+        self.format = format
+        self.starts = starts
+        self.durations = durations
+        self.text = ' '.join(pieces)
+
+        # Segment boundaries in the text buffer, computed once in linear time
+        self.offsets = array('I', [0])
+        position = 0
+        for piece in pieces:
+            position += len(piece) + 1
+            self.offsets.append(position)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        """Return (start_ms, duration_ms, text) for segment ``i``."""
+        if i < 0:
+            i += len(self)
+        text = self.text[self.offsets[i]:self.offsets[i + 1]].rstrip(' ')
+        return self.starts[i], self.durations[i], text
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class _Builder:
+    """Accumulates cues, dropping lines repeated by rolling auto-captions."""
+
+    def __init__(self, format, dedupe=True):
+        self.format = format
+        self.dedupe = dedupe
+        self.starts = array('I')
+        self.durations = array('I')
+        self.pieces = []
+        self.recent = ('', '')  # Last two emitted lines
+
+    def add(self, start_ms, duration_ms, lines):
+        novel = []
+        recent = self.recent
+        for line in lines:
+            line = ' '.join(line.split())
+            if not line or (self.dedupe and line in recent):
+                continue
+            novel.append(line)
+            recent = (recent[1], line)
+        self.recent = recent
+
+        if novel:
+            self.starts.append(int(start_ms) if start_ms > 0 else 0)
+            self.durations.append(int(duration_ms) if duration_ms > 0 else 0)
+            self.pieces.append(novel[0] if len(novel) == 1 else ' '.join(novel))
+
+    def build(self):
+        return Segments(self.format, self.starts, self.durations, self.pieces)
+
+
+def parse_json3(content, dedupe=True):
+    data = json.loads(content)
+    builder = _Builder('json3', dedupe)
+
+    for event in data.get('events', ()):
+        segs = event.get('segs')
+        if not segs or event.get('aAppend'):
+            continue
+        text = ''.join([seg.get('utf8', '') for seg in segs])
+        builder.add(event.get('tStartMs', 0), event.get('dDurationMs', 0), text.split('\n') if '\n' in text else (text,))
+
+    return builder.build()
+
+
+def parse_srv3(content, dedupe=True):
+    root = ET.fromstring(content)
+    builder = _Builder('srv3', dedupe)
+
+    # srv3: <p t="ms" d="ms">text<s>word</s></p>; srv1: <text start="s" dur="s">
+    for p in root.iter('p'):
+        text = ''.join(p.itertext())
+        builder.add(int(p.get('t', 0)), int(p.get('d', 0)), text.split('\n'))
+    for node in root.iter('text'):
+        text = html.unescape(''.join(node.itertext()))
+        builder.add(float(node.get('start', 0)) * 1000, float(node.get('dur', 0)) * 1000, text.split('\n'))
+
+    return builder.build()
+
+
+def parse_vtt(content, dedupe=True):
+    if isinstance(content, bytes):
+        content = content.decode('utf-8', errors='ignore')
+    builder = _Builder('vtt', dedupe)
+
+    start = duration = None
+    lines = []
+    for line in content.splitlines():
+        timing = _VTT_TIMING.search(line) if '-->' in line else None
+        if timing:
+            if start is not None:
+                builder.add(start, duration, lines)
+            h1, m1, s1, ms1, h2, m2, s2, ms2 = timing.groups()
+            start = ((int(h1 or 0) * 60 + int(m1)) * 60 + int(s1)) * 1000 + int(ms1)
+            duration = ((int(h2 or 0) * 60 + int(m2)) * 60 + int(s2)) * 1000 + int(ms2) - start
+            lines = []
+        elif start is None:
+            continue  # Header, cue identifier or NOTE block
+        elif line and not line.isspace():
+            if '<' in line:
+                line = _TAG.sub('', line)
+            if '&' in line:
+                line = html.unescape(line)
+            lines.append(line)
+        elif lines:
+            # Blank line ends the cue
+            builder.add(start, duration, lines)
+            start = None
+            lines = []
+
+    if start is not None:
+        builder.add(start, duration, lines)
+
+    return builder.build()
+
+
+def parse_subtitles(content, dedupe=True):
+    """Parse a subtitle file, detecting json3, srv3/XML or VTT from its content."""
+    head = content[:64]
+    if isinstance(head, bytes):
+        head = head.decode('utf-8', errors='ignore')
+    head = head.lstrip('\ufeff \t\r\n')
+
+    if head.startswith('{'):
+        return parse_json3(content, dedupe)
+    if head.startswith('<'):
+        return parse_srv3(content, dedupe)
+    return parse_vtt(content, dedupe)
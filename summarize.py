@@ -1,36 +1,372 @@
 # Google Model Setup
 import os
-import google.generativeai as genai
+import hashlib
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from structured_output import response_schema
+from transcript_compression import COMPRESSION_VERSION, compress_transcript, estimate_tokens, fit_to_budget
+from cache import shared_cache
+from memory_cache import TTLCache
+import metrics
 import json
 
+logger = logging.getLogger(__name__)
+
 # Configure API key
 GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY')
-genai.configure(api_key=GOOGLE_API_KEY)
 
-# Initialize LLM
-model = genai.GenerativeModel("gemini-1.5-flash-latest")
+# Initialize LLM on first use: google.generativeai takes ~0.5s to import,
+# which every worker boot (and cache hit-only worker) would otherwise pay
+MODEL_NAME = "gemini-1.5-flash-latest"
+model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    global model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=GOOGLE_API_KEY)
+                model = genai.GenerativeModel(MODEL_NAME)
+    return model
+
+PROMPT_TEMPLATE = """Summarize the following text using two bullets per section.
+    {transcript}
+    """
+
+# Map-reduce settings for long transcripts: each chunk is summarized on its
+# own (in parallel), then a reduce pass merges the partial sections
+SUMMARY_CHUNKED = os.environ.get('SUMMARY_CHUNKED', '1') == '1'
+CHUNK_TOKENS = int(os.environ.get('SUMMARY_CHUNK_TOKENS', 2000))
+MAX_CHUNKS = int(os.environ.get('SUMMARY_MAX_CHUNKS', 12))
+MAX_WORKERS = int(os.environ.get('SUMMARY_MAX_WORKERS', 4))
+
+# Transcripts are compressed (annotations, filler, rolling duplicates) and
+# fitted to this many input tokens; over-budget transcripts keep evenly
+# spaced windows of the whole video. Near-budget results are confirmed with
+# the model's count_tokens (one extra request) whenever Gemini is configured;
+# SUMMARY_COUNT_TOKENS=0 relies on the local estimate alone
+TOKEN_BUDGET = int(os.environ.get('SUMMARY_TOKEN_BUDGET', CHUNK_TOKENS * MAX_CHUNKS))
+COUNT_TOKENS = os.environ.get('SUMMARY_COUNT_TOKENS', '1' if GOOGLE_API_KEY else '0') == '1'
 
-def summarize_transcript(transcript):
-    # Limit transcript length to avoid token limits
-    max_chars = 5000
-    truncated = transcript[:max_chars]
+MAP_PROMPT_TEMPLATE = """The following text is part {part} of {total} of a video transcript.
+    Summarize it using two bullets per section.
+    {transcript}
+    """
 
-    prompt = f"""Summarize the following text using two bullets per section.
-    {truncated}
+REDUCE_PROMPT_TEMPLATE = """The following JSON holds partial summaries of consecutive parts of one video, in order.
+    Merge them into a single summary of the whole video using two bullets per section.
+    Combine overlapping sections and keep the order of the video.
+    {partials}
     """
 
-    generation_config = genai.GenerationConfig(
+# Summary cache: entries are keyed on everything that affects the output, so
+# editing the model, prompt or schema invalidates old entries automatically
+SUMMARY_CACHE_TTL = int(os.environ.get('SUMMARY_CACHE_TTL', 7 * 24 * 3600))
+SUMMARY_CACHE_MAX_MB = int(os.environ.get('SUMMARY_CACHE_MAX_MB', 64))
+
+SUMMARY_FINGERPRINT = hashlib.sha256(json.dumps({
+    'model': MODEL_NAME,
+    'prompt': PROMPT_TEMPLATE,
+    'map_prompt': MAP_PROMPT_TEMPLATE,
+    'reduce_prompt': REDUCE_PROMPT_TEMPLATE,
+    'chunking': [SUMMARY_CHUNKED, CHUNK_TOKENS, MAX_CHUNKS],
+    'compression': [TOKEN_BUDGET, COUNT_TOKENS, COMPRESSION_VERSION],
+    'schema': response_schema,
+}, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+summary_cache = TTLCache(
+    ttl=SUMMARY_CACHE_TTL,
+    max_entries=1024,
+    max_bytes=16 * 1024 * 1024,
+    shared=shared_cache('summaries', max_bytes=SUMMARY_CACHE_MAX_MB * 1024 * 1024)
+)
+
+
+def summary_key(transcript):
+    """Content-addressed cache key for a transcript under the current prompt."""
+    digest = hashlib.sha256(transcript.encode('utf-8')).hexdigest()
+    return f"summary:{SUMMARY_FINGERPRINT}:{digest}"
+
+
+def video_summary_key(video_id):
+    """Per-video pointer so a hit can skip the transcript fetch too."""
+    return f"video:{SUMMARY_FINGERPRINT}:{video_id}"
+
+
+def cached_summarize_transcript(transcript):
+    key = summary_key(transcript)
+
+    summary = summary_cache.get(key)
+    if summary is not None:
+        logger.info("Summary cache hit")
+        return summary
+
+    summary = summarize_transcript(transcript)
+    if summary is not None:
+        summary_cache.set(key, summary)
+    return summary
+
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def chunk_transcript(transcript, max_tokens=CHUNK_TOKENS, max_chunks=MAX_CHUNKS):
+    """Split a transcript into chunks of at most ``max_tokens`` tokens.
+
+    Splits on sentence boundaries, falling back to word boundaries for
+    unpunctuated auto-captions. If there are more than ``max_chunks`` chunks,
+    an evenly spaced subset is kept so the summary still spans the video.
+    """
+    max_chars = max_tokens * 4
+
+    pieces = []
+    for sentence in _SENTENCE_END.split(transcript):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        # Sentence (or unpunctuated caption run) too long: split on words
+        words = []
+        length = 0
+        for word in sentence.split():
+            if length + len(word) + 1 > max_chars and words:
+                pieces.append(" ".join(words))
+                words = []
+                length = 0
+            words.append(word)
+            length += len(word) + 1
+        if words:
+            pieces.append(" ".join(words))
+
+    chunks = []
+    current = []
+    length = 0
+    for piece in pieces:
+        if length + len(piece) + 1 > max_chars and current:
+            chunks.append(" ".join(current))
+            current = []
+            length = 0
+        current.append(piece)
+        length += len(piece) + 1
+    if current:
+        chunks.append(" ".join(current))
+
+    if len(chunks) > max_chunks:
+        step = len(chunks) / max_chunks
+        chunks = [chunks[int(i * step)] for i in range(max_chunks)]
+
+    return chunks
+
+
+def _generation_config():
+    import google.generativeai as genai
+    return genai.GenerationConfig(
     response_mime_type="application/json",
     response_schema=response_schema
     )
 
-    result = model.generate_content(prompt, generation_config=generation_config)
+
+def _record_usage(response, prompt, fields):
+    """Count prompt/output tokens (from usage metadata, else estimated)."""
+    usage = getattr(response, 'usage_metadata', None)
+    fields['input_tokens'] = getattr(usage, 'prompt_token_count', 0) or estimate_tokens(prompt)
+    fields['output_tokens'] = getattr(usage, 'candidates_token_count', 0) or 0
+    metrics.inc('llm_tokens_total', fields['input_tokens'], direction='input')
+    metrics.inc('llm_tokens_total', fields['output_tokens'], direction='output')
+
+
+def _generate(prompt):
+    with metrics.span('llm', mode='generate') as fields:
+        result = get_model().generate_content(prompt, generation_config=_generation_config())
+        _record_usage(result, prompt, fields)
 
     # Parse the result text as JSON
     try:
         result_dict = json.loads(result.text)
         return result_dict
     except json.JSONDecodeError as e:
-        print(f"Error decoding JSON: {e}")
+        logger.warning("Error decoding JSON: %s", e)
         return None
+
+
+def summarize_transcript(transcript, max_chunks=MAX_CHUNKS, max_workers=MAX_WORKERS):
+    prompt, fallback = _final_prompt(transcript, max_chunks, max_workers)
+    if prompt is None:
+        return fallback
+
+    result = _generate(prompt)
+    if fallback is not None and not (result and result.get('sections')):
+        logger.warning("Reduce pass failed, returning concatenated partial sections")
+        return fallback
+    return result
+
+
+def stream_summarize_transcript(transcript, max_chunks=MAX_CHUNKS, max_workers=MAX_WORKERS):
+    """Yield summary sections one by one as Gemini generates them.
+
+    Long transcripts still run the map stage up front; only the final
+    (single or reduce) pass is streamed.
+    """
+    prompt, fallback = _final_prompt(transcript, max_chunks, max_workers)
+    if prompt is None:
+        return
+
+    parser = SectionStreamParser()
+    emitted = 0
+    with metrics.span('llm', mode='stream') as fields:
+        start = time.perf_counter()
+        response = get_model().generate_content(prompt, generation_config=_generation_config(), stream=True)
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                continue  # Chunk without text parts (e.g. the final finish_reason chunk)
+            for section in parser.feed(text):
+                if emitted == 0:
+                    metrics.observe('stage_seconds', time.perf_counter() - start, stage='llm_first_section', outcome='ok')
+                emitted += 1
+                yield section
+        _record_usage(response, prompt, fields)
+
+    if emitted == 0 and fallback is not None:
+        logger.warning("Reduce pass failed, returning concatenated partial sections")
+        yield from fallback['sections']
+
+
+def count_tokens(text):
+    """Exact input token count from the model (a network round trip).
+
+    Falls back to the local estimate if the request fails, so budgeting
+    never costs a summary.
+    """
+    try:
+        return get_model().count_tokens(text).total_tokens
+    except Exception as e:
+        logger.warning("count_tokens failed, using the estimate: %s", e)
+        return estimate_tokens(text)
+
+
+def prepare_transcript(transcript, budget=TOKEN_BUDGET):
+    """Compressed transcript fitted to ``budget`` tokens."""
+    before = estimate_tokens(transcript)
+    transcript = fit_to_budget(
+        compress_transcript(transcript),
+        budget,
+        count_tokens=count_tokens if COUNT_TOKENS else None
+    )
+    logger.info("Transcript compressed: ~%d -> ~%d tokens", before, estimate_tokens(transcript))
+    return transcript
+
+
+def _final_prompt(transcript, max_chunks, max_workers):
+    """Return (prompt, fallback) for the last generation pass.
+
+    Short transcripts get the single-pass prompt. Long ones run the map stage
+    here and get the reduce prompt, with the concatenated partial sections as
+    the fallback if the reduce pass fails.
+    """
+    transcript = prepare_transcript(transcript)
+
+    if not SUMMARY_CHUNKED:
+        return PROMPT_TEMPLATE.format(transcript=transcript), None
+
+    chunks = chunk_transcript(transcript, max_chunks=max_chunks)
+    if len(chunks) <= 1:
+        return PROMPT_TEMPLATE.format(transcript=transcript), None
+
+    sections = _map_sections(chunks, max_workers)
+    if not sections:
+        return None, None
+
+    return REDUCE_PROMPT_TEMPLATE.format(partials=json.dumps(sections)), {'sections': sections}
+
+
+def _map_sections(chunks, max_workers):
+    total = len(chunks)
+    logger.info("Map-reduce summary: %d chunks, %d workers", total, min(max_workers, total))
+
+    # Map: summarize each chunk concurrently, results kept in video order
+    def summarize_chunk(args):
+        part, chunk = args
+        return _generate(MAP_PROMPT_TEMPLATE.format(part=part, total=total, transcript=chunk))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as pool:
+        partials = list(pool.map(summarize_chunk, enumerate(chunks, start=1)))
+
+    sections = []
+    for partial in partials:
+        if partial and isinstance(partial.get('sections'), list):
+            sections.extend(partial['sections'])
+    return sections
+
+
+class SectionStreamParser:
+    """Pull complete section objects out of a streamed {"sections": [...]} document.
+
+    Feed it text fragments as they arrive; each call returns the sections
+    whose closing brace has been seen since the previous call.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.pos = 0
+        self.in_array = False
+        self.closed = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, text):
+        self.buffer += text
+        sections = []
+
+        if not self.in_array:
+            # Wait until the "sections" key and its opening bracket arrive
+            key = self.buffer.find('"sections"')
+            bracket = self.buffer.find('[', key) if key != -1 else -1
+            if bracket == -1:
+                return sections
+            self.in_array = True
+            self.buffer = self.buffer[bracket + 1:]
+            self.pos = 0
+
+        while not self.closed and self.pos < len(self.buffer):
+            ch = self.buffer[self.pos]
+            self.pos += 1
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                if self.depth == 0:
+                    # Drop separators before the object so it starts at 0
+                    self.buffer = self.buffer[self.pos - 1:]
+                    self.pos = 1
+                self.depth += 1
+            elif ch in '}]':
+                if self.depth == 0:
+                    self.closed = True  # End of the sections array
+                    break
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        section = json.loads(self.buffer[:self.pos])
+                    except json.JSONDecodeError:
+                        section = None
+                    if isinstance(section, dict):
+                        sections.append(section)
+                    self.buffer = self.buffer[self.pos:]
+                    self.pos = 0
+
+        return sections
@@ -0,0 +1,94 @@
+# Transcript compression before the LLM call
+import re
+
+# Part of the summary cache key: bump whenever a change here alters the
+# compressed output, so summaries of the old output aren't reused
+COMPRESSION_VERSION = 3
+
+# Bracketed non-speech annotations ([Music], [Applause], (laughs), ♪ lyrics ♪)
+_ANNOTATION = re.compile(r'\[[^\]]{0,40}\]|\((?:music|applause|laughs?|laughter|inaudible|silence)\)|[♪♫]+', re.I)
+# Disfluencies that carry no content (kept: "like", "you know" - too often
+# meaningful; "mm" - also millimetres).
+# Removed with the space before them and one comma, so surrounding
+# punctuation survives: "that's it, um." -> "that's it.", "one, uh, two" -> "one, two"
+_FILLER_WORD = r'\b(?:u+m+|u+h+|e+r+m+|h+m+|mhm|ah+)\b'
+_FILLER = re.compile(rf',?\s*{_FILLER_WORD}(?=[.!?])|\s*{_FILLER_WORD},?', re.I)
+
+# Repeated word runs collapsed in auto-captions ("so today we so today we
+# are" -> "so today we are"); rolling captions repeat up to a line's worth.
+# Single repeated words ("no no no") are usually speech and kept
+MIN_REPEAT_WORDS = 2
+MAX_REPEAT_WORDS = 12
+
+# Words per window when sampling an over-budget transcript
+WINDOW_WORDS = 120
+
+
+def estimate_tokens(text):
+    """Cheap local token estimate (~4 characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+def collapse_repeats(words, max_n=MAX_REPEAT_WORDS):
+    """Drop word runs that immediately repeat the run before them.
+
+    Only for auto-captions. Words must match including punctuation, so
+    "New York, New York" and sentence ends survive.
+    """
+    out = []
+    lowered = []
+    for word in words:
+        out.append(word)
+        lowered.append(word.lower())
+        last = lowered[-1]
+        for n in range(min(max_n, len(lowered) // 2), MIN_REPEAT_WORDS - 1, -1):
+            if lowered[-1 - n] == last and lowered[-n:] == lowered[-2 * n:-n]:
+                del out[-n:]
+                del lowered[-n:]
+                break
+    return out
+
+
+def compress_transcript(text):
+    """Strip annotations and filler, collapse whitespace."""
+    text = _ANNOTATION.sub(' ', text)
+    text = _FILLER.sub('', text)
+    return ' '.join(text.split())
+
+
+def _sample_windows(words, keep):
+    """Keep ``keep`` evenly spaced windows of words so the result spans the
+    whole video instead of just its beginning."""
+    windows = [words[i:i + WINDOW_WORDS] for i in range(0, len(words), WINDOW_WORDS)]
+    if keep >= len(windows):
+        return ' '.join(words)
+    if keep == 1:
+        return ' '.join(windows[0])
+    # First and last windows always included
+    step = (len(windows) - 1) / (keep - 1)
+    return ' … '.join(' '.join(windows[round(i * step)]) for i in range(keep))
+
+
+def fit_to_budget(text, budget, count_tokens=None):
+    """Return ``text`` cut down to at most ``budget`` tokens.
+
+    Sizing uses the local estimator. ``count_tokens`` (e.g. the model's own
+    counter) is only called to confirm results close to the budget, and the
+    sample is shrunk if the exact count is over.
+    """
+    estimate = estimate_tokens(text)
+    if estimate <= budget * 0.9 or (estimate <= budget and count_tokens is None):
+        return text
+
+    words = text.split()
+    windows = -(-len(words) // WINDOW_WORDS)
+    keep = max(1, int(windows * budget / estimate))
+    for _ in range(4):
+        result = _sample_windows(words, keep)
+        tokens = estimate_tokens(result)
+        if tokens <= budget and count_tokens is not None:
+            tokens = count_tokens(result)
+        if tokens <= budget or keep == 1:
+            return result
+        keep = max(1, min(keep - 1, int(keep * budget / tokens)))
+    return result